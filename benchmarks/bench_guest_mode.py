@@ -0,0 +1,357 @@
+"""Offline benchmarks for the Guest Mode hot paths.
+
+Runs zone activation/restore against lightweight stand-ins for
+``hass.states`` and ``hass.services`` (no running Home Assistant, no
+event loop thread, no recorder) so the integration's own overhead is
+what gets measured.
+
+Usage, from the repository root::
+
+    python benchmarks/bench_guest_mode.py
+    python benchmarks/bench_guest_mode.py --entities 10000 --zones 500 --zone-size 80
+    python benchmarks/bench_guest_mode.py --latency 2 --output bench_output.txt
+
+Every scenario reports wall time (median of ``--repeat`` rounds), service
+calls, entity commands and state writes, and peak / retained memory from
+a separate tracemalloc round.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homeassistant.core import CoreState, State  # noqa: E402
+
+from custom_components.guest_mode import _async_restore_zone_states  # noqa: E402
+from custom_components.guest_mode.const import DOMAIN  # noqa: E402
+from custom_components.guest_mode.membership import MembershipIndex  # noqa: E402
+from custom_components.guest_mode.metrics import ToggleTimings  # noqa: E402
+from custom_components.guest_mode.ownership import OwnershipIndex  # noqa: E402
+from custom_components.guest_mode.plan import build_zone_plan  # noqa: E402
+from custom_components.guest_mode.ratelimit import RateLimiter  # noqa: E402
+from custom_components.guest_mode.retry import RetryQueue  # noqa: E402
+from custom_components.guest_mode.schedule import ZoneScheduler  # noqa: E402
+from custom_components.guest_mode.switch import (  # noqa: E402
+    MainGuestModeSwitch,
+    ZoneGuestModeSwitch,
+)
+from custom_components.guest_mode.trace import TraceBuffer  # noqa: E402
+
+WIFI_ENTITY = "switch.bench_wifi"
+
+
+# ---------------------------------------------------------------------------
+# Stand-ins
+# ---------------------------------------------------------------------------
+
+class BenchStates:
+    """The subset of the state machine the integration reads."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        return self._states.get(entity_id)
+
+    def async_set(
+        self, entity_id: str, state: str, attributes: dict[str, Any] | None = None
+    ) -> None:
+        self._states[entity_id] = State(entity_id, state, attributes)
+
+
+class BenchServices:
+    """Counts service calls and applies turn_on/turn_off/scene.apply."""
+
+    def __init__(self, states: BenchStates, latency: float) -> None:
+        self._states = states
+        self._latency = latency
+        self.calls: Counter[str] = Counter()
+        self.entity_commands = 0
+
+    async def async_call(
+        self,
+        domain: str,
+        service: str,
+        service_data: dict[str, Any] | None = None,
+        blocking: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        self.calls[f"{domain}.{service}"] += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        if domain == "scene":
+            entities = service_data["entities"]
+            self.entity_commands += len(entities)
+            for entity_id, value in entities.items():
+                attributes = {k: v for k, v in value.items() if k != "state"}
+                self._states.async_set(entity_id, value["state"], attributes)
+            return
+        entity_ids = service_data["entity_id"]
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        self.entity_commands += len(entity_ids)
+        new_state = "on" if service == "turn_on" else "off"
+        for entity_id in entity_ids:
+            self._states.async_set(entity_id, new_state)
+
+
+class BenchHass:
+    """Just enough of HomeAssistant for the switch entities."""
+
+    def __init__(self, latency: float) -> None:
+        self.states = BenchStates()
+        self.services = BenchServices(self.states, latency)
+        self.data: dict[str, Any] = {}
+        self.state = CoreState.running
+        self.loop = asyncio.get_running_loop()
+        self.state_writes = 0
+
+    def async_create_task(self, target: Awaitable[Any], *args: Any, **kwargs: Any) -> asyncio.Task:
+        return self.loop.create_task(target)
+
+
+class BenchStore:
+    """In-memory replacement for GuestModeStore."""
+
+    def __init__(self) -> None:
+        self.saved_states: dict[str, dict[str, Any]] = {}
+        self.schedules: dict[str, dict[str, float]] = {}
+
+    def async_schedule_save(self) -> None:
+        pass
+
+
+class BenchZoneSwitch(ZoneGuestModeSwitch):
+    def async_write_ha_state(self) -> None:
+        self.hass.state_writes += 1
+
+
+class BenchMainSwitch(MainGuestModeSwitch):
+    def async_write_ha_state(self) -> None:
+        self.hass.state_writes += 1
+
+
+# ---------------------------------------------------------------------------
+# Setup
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Bench:
+    hass: BenchHass
+    entry: SimpleNamespace
+    zones: list[BenchZoneSwitch]
+    main: BenchMainSwitch
+
+
+def build_config(args: argparse.Namespace) -> tuple[dict[str, str], dict[str, Any]]:
+    """Return initial entity states and a zones config."""
+    rng = random.Random(args.seed)
+    states: dict[str, str] = {WIFI_ENTITY: "on"}
+    for index in range(args.entities):
+        kind = rng.random()
+        if kind < 0.55:
+            states[f"light.bench_{index}"] = "on"
+        elif kind < 0.8:
+            states[f"switch.bench_{index}"] = "on"
+        elif kind < 0.95:
+            states[f"automation.bench_{index}"] = "on"
+        else:
+            states[f"script.bench_{index}"] = "off"
+    pool = sorted(states)
+    pool.remove(WIFI_ENTITY)
+
+    zones: dict[str, Any] = {}
+    for number in range(args.zones):
+        zone: dict[str, Any] = {
+            "name": f"Zone {number}",
+            "automations_off": [],
+            "scripts_on": [],
+            "entities_off": [],
+            "entities_on": [],
+        }
+        for entity_id in rng.sample(pool, min(args.zone_size, len(pool))):
+            if entity_id.startswith("automation."):
+                zone["automations_off"].append(entity_id)
+            elif entity_id.startswith("script."):
+                zone["scripts_on"].append(entity_id)
+            elif rng.random() < 0.7:
+                zone["entities_off"].append(entity_id)
+            else:
+                zone["entities_on"].append(entity_id)
+        # A deleted entity per zone keeps the missing-entity path warm
+        zone["entities_off"].append(f"light.bench_missing_{number}")
+        zones[f"zone_{number}"] = zone
+    return states, zones
+
+
+async def build_bench(args: argparse.Namespace) -> Bench:
+    """Create the stand-in hass, the entry data and all switch entities."""
+    hass = BenchHass(args.latency / 1000)
+    states, zones = build_config(args)
+    for entity_id, state in states.items():
+        hass.states.async_set(entity_id, state)
+    entry = SimpleNamespace(
+        entry_id="bench",
+        data={"zones": zones, "global_wifi": {"entity": WIFI_ENTITY, "mode": "off"}},
+    )
+    store = BenchStore()
+    zone_entities: dict[str, BenchZoneSwitch] = {}
+    rate_limiter = RateLimiter(hass, {})
+    # Mirrors async_setup_entry
+    hass.data[DOMAIN] = {
+        entry.entry_id: {
+            "store": store,
+            "saved_states": store.saved_states,
+            "zones": zones,
+            "zone_entities": zone_entities,
+            "active_zones": set(),
+            "owners": OwnershipIndex(),
+            "rate_limiter": rate_limiter,
+            "retry_queue": RetryQueue(hass, rate_limiter, lambda zone_id: None),
+            # Zones here have no duration, so no timer is ever armed
+            "scheduler": ZoneScheduler(hass, store, lambda zone_id, action: None, lambda zone_id: None),
+            "timings": {},
+            "fan_out_timings": ToggleTimings(),
+            "traces": TraceBuffer(),
+            # Zones here have no dynamic selectors, so the index stays empty
+            "members": MembershipIndex(hass, lambda: None),
+        }
+    }
+    for zone_id, zone_data in zones.items():
+        zone_entities[zone_id] = BenchZoneSwitch(hass, entry, zone_id, zone_data)
+    return Bench(hass, entry, list(zone_entities.values()), BenchMainSwitch(hass, entry))
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+async def _plan_all(bench: Bench) -> None:
+    for zone in bench.zones:
+        build_zone_plan(bench.hass, zone.zone_data)
+
+
+async def _zones_on(bench: Bench) -> None:
+    for zone in bench.zones:
+        await zone.async_turn_on()
+
+
+async def _zones_off(bench: Bench) -> None:
+    for zone in bench.zones:
+        await zone.async_turn_off()
+
+
+async def _restore_all(bench: Bench) -> None:
+    for zone in bench.zones:
+        await _async_restore_zone_states(bench.hass, bench.entry, zone.zone_id)
+
+
+# (name, setup, measured); setups run untimed and state carries over
+SCENARIOS: list[tuple[str, Callable[[Bench], Awaitable[None]] | None, Callable[[Bench], Awaitable[None]]]] = [
+    ("build_zone_plan (all zones)", None, _plan_all),
+    ("zone async_turn_on (each zone)", None, _zones_on),
+    ("zone async_turn_off (each zone)", None, _zones_off),
+    ("main fan-out on", None, lambda bench: bench.main.async_turn_on()),
+    ("main fan-out off", None, lambda bench: bench.main.async_turn_off()),
+    ("restore_zone_states (each zone)", lambda bench: bench.main.async_turn_on(), _restore_all),
+]
+
+
+@dataclass
+class Result:
+    seconds: float
+    calls: int
+    entity_commands: int
+    state_writes: int
+    peak_kib: float | None = None
+    retained_kib: float | None = None
+
+
+async def run_round(args: argparse.Namespace, *, trace_memory: bool) -> list[Result]:
+    bench = await build_bench(args)
+    hass = bench.hass
+    results = []
+    for _name, setup, measured in SCENARIOS:
+        if setup is not None:
+            await setup(bench)
+        hass.services.calls.clear()
+        hass.services.entity_commands = 0
+        hass.state_writes = 0
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        await measured(bench)
+        seconds = time.perf_counter() - start
+        result = Result(
+            seconds,
+            sum(hass.services.calls.values()),
+            hass.services.entity_commands,
+            hass.state_writes,
+        )
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result.peak_kib = peak / 1024
+            result.retained_kib = current / 1024
+        results.append(result)
+    return results
+
+
+async def run(args: argparse.Namespace) -> str:
+    rounds = [await run_round(args, trace_memory=False) for _ in range(args.repeat)]
+    memory = await run_round(args, trace_memory=True)
+
+    lines = [
+        f"Guest Mode benchmark: {args.entities} entities, {args.zones} zones x "
+        f"{args.zone_size} entities, {args.latency} ms service latency, "
+        f"median of {args.repeat} rounds",
+        "",
+        f"{'scenario':<34}{'wall ms':>10}{'calls':>8}{'entity cmds':>13}"
+        f"{'writes':>8}{'peak KiB':>10}{'kept KiB':>10}",
+    ]
+    for index, (name, _setup, _measured) in enumerate(SCENARIOS):
+        first = rounds[0][index]
+        seconds = statistics.median(round_[index].seconds for round_ in rounds)
+        lines.append(
+            f"{name:<34}{seconds * 1000:>10.1f}{first.calls:>8}{first.entity_commands:>13}"
+            f"{first.state_writes:>8}{memory[index].peak_kib:>10.0f}{memory[index].retained_kib:>10.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--zones", type=int, default=200)
+    parser.add_argument("--zone-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0, help="simulated ms per service call")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    # Missing-entity warnings are expected and would dominate the output
+    logging.basicConfig(level=logging.ERROR)
+
+    report = asyncio.run(run(args))
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,296 @@
-"""Guest Mode Integration."""
-from __future__ import annotations
-
-import logging
-
-import voluptuous as vol
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.typing import ConfigType
-
-from .const import DOMAIN
-
-_LOGGER = logging.getLogger(__name__)
-
-PLATFORMS = ["switch"]
-
-CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
-
-
-async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
-    hass.data.setdefault(DOMAIN, {})
-    return True
-
-
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up integration from config entry."""
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {
-        "saved_states": {},
-        "zones": entry.data.get("zones", {}),
-    }
-
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-
-    async def handle_restore_states(call: ServiceCall) -> None:
-        """Restore saved states for a specific zone (manual service call)."""
-        zone_id = call.data.get("zone_id")
-        data = hass.data[DOMAIN][entry.entry_id]
-
-        if zone_id not in data["saved_states"]:
-            _LOGGER.warning("No saved states found for zone '%s'", zone_id)
-            return
-
-        saved = data["saved_states"].pop(zone_id)
-        for entity_id, state in saved.items():
-            # Use domain-specific services for automations and scripts
-            entity_domain = entity_id.split(".", 1)[0]
-            svc_domain = (
-                entity_domain if entity_domain in ("automation", "script")
-                else "homeassistant"
-            )
-            service = "turn_on" if state == "on" else "turn_off"
-            await hass.services.async_call(
-                svc_domain, service, {"entity_id": entity_id}
-            )
-
-    hass.services.async_register(
-        DOMAIN,
-        "restore_zone_states",
-        handle_restore_states,
-        schema=vol.Schema({vol.Required("zone_id"): cv.string}),
-    )
-
-    return True
-
-
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
-    return unload_ok
\ No newline at end of file
+"""Guest Mode Integration."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SIGNAL_ZONE_REMOVED, SIGNAL_ZONES_ADDED
+from .helpers import Failure
+from .membership import MembershipIndex
+from .metrics import ToggleTimings
+from .ownership import OwnershipIndex
+from .ratelimit import RateLimiter
+from .retry import RetryQueue
+from .schedule import ACTION_TURN_ON, SCHEDULE_SCHEMA, UNSCHEDULE_SCHEMA, ZoneScheduler
+from .snapshot import async_restore_snapshot, failed_snapshot
+from .store import GuestModeStore
+from .trace import TraceBuffer, failures_trace, new_trace
+from .transfer import IMPORT_SCHEMA, async_import_zones, export_zones
+
+_LOGGER = logging.getLogger(__name__)
+
+PLATFORMS = ["switch", "sensor"]
+
+CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    hass.data.setdefault(DOMAIN, {})
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up integration from config entry."""
+    hass.data.setdefault(DOMAIN, {})
+    store = GuestModeStore(hass, entry.entry_id)
+    await store.async_load()
+    zone_entities: dict = {}
+
+    @callback
+    def _async_zone_changed(zone_id: str) -> None:
+        """Refresh the pending_retries and scheduled attributes of a zone switch."""
+        zone = zone_entities.get(zone_id)
+        if zone is not None:
+            zone.async_write_ha_state()
+
+    @callback
+    def _async_schedule_due(zone_id: str, action: str) -> None:
+        """Run a scheduled turn_on/turn_off through the zone's toggle path."""
+        zone = zone_entities.get(zone_id)
+        if zone is None:
+            return
+        hass.async_create_task(
+            zone.async_turn_on() if action == ACTION_TURN_ON else zone.async_turn_off()
+        )
+
+    @callback
+    def _async_members_changed() -> None:
+        """Let zones with dynamic membership pick up registry changes."""
+        for zone in zone_entities.values():
+            zone.async_members_updated()
+
+    # Area/floor/label/device class index, kept current from registry events
+    members = MembershipIndex(hass, _async_members_changed)
+    entry.async_on_unload(members.async_setup())
+
+    rate_limiter = RateLimiter(hass, entry.data.get("rate_limits", {}))
+    hass.data[DOMAIN][entry.entry_id] = {
+        "store": store,
+        "saved_states": store.saved_states,
+        # A copy: the listener diffs the next config entry update against it
+        "zones": dict(entry.data.get("zones", {})),
+        "zone_entities": zone_entities,
+        "active_zones": set(),
+        "owners": OwnershipIndex(),
+        "rate_limiter": rate_limiter,
+        "retry_queue": RetryQueue(hass, rate_limiter, _async_zone_changed),
+        "scheduler": ZoneScheduler(hass, store, _async_schedule_due, _async_zone_changed),
+        "timings": {},
+        "fan_out_timings": ToggleTimings(),
+        "traces": TraceBuffer(),
+        "members": members,
+    }
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    # Zone switches exist now, so schedules missed while stopped can run
+    hass.data[DOMAIN][entry.entry_id]["scheduler"].async_start()
+
+    async def handle_restore_states(call: ServiceCall) -> None:
+        """Restore saved states for a specific zone (manual service call)."""
+        await _async_restore_zone_states(hass, entry, call.data.get("zone_id"))
+
+    hass.services.async_register(
+        DOMAIN,
+        "restore_zone_states",
+        handle_restore_states,
+        schema=vol.Schema({vol.Required("zone_id"): cv.string}),
+    )
+
+    @callback
+    def handle_export_zones(call: ServiceCall) -> ServiceResponse:
+        """Return all zones and the WiFi settings."""
+        return export_zones(entry)
+
+    @callback
+    def handle_import_zones(call: ServiceCall) -> ServiceResponse:
+        """Validate and store zones in one config entry write."""
+        return async_import_zones(hass, entry, call.data)
+
+    def _zone_entity(zone_id: str) -> Any:
+        zone = zone_entities.get(zone_id)
+        if zone is None:
+            raise ServiceValidationError(f"Unknown Guest Mode zone '{zone_id}'")
+        return zone
+
+    @callback
+    def handle_plan_zone(call: ServiceCall) -> ServiceResponse:
+        """Return what switching a zone would do, without doing it."""
+        zone = _zone_entity(call.data["zone_id"])
+        return zone.async_plan_toggle(call.data["action"] == "turn_on")
+
+    @callback
+    def handle_schedule_zone(call: ServiceCall) -> None:
+        """Turn a zone on or off at a point in time or after a delay."""
+        zone_id = _zone_entity(call.data["zone_id"]).zone_id
+        when = call.data.get("at") or dt_util.utcnow() + call.data["delay"]
+        hass.data[DOMAIN][entry.entry_id]["scheduler"].async_schedule(
+            zone_id, call.data["action"], when
+        )
+
+    @callback
+    def handle_unschedule_zone(call: ServiceCall) -> None:
+        """Cancel pending scheduled actions of a zone."""
+        hass.data[DOMAIN][entry.entry_id]["scheduler"].async_cancel(
+            call.data["zone_id"], call.data.get("action")
+        )
+
+    hass.services.async_register(
+        DOMAIN, "schedule_zone", handle_schedule_zone, schema=SCHEDULE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, "unschedule_zone", handle_unschedule_zone, schema=UNSCHEDULE_SCHEMA
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        "plan_zone",
+        handle_plan_zone,
+        schema=vol.Schema(
+            {
+                vol.Required("zone_id"): cv.string,
+                vol.Optional("action", default="turn_on"): vol.In(["turn_on", "turn_off"]),
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "export_zones",
+        handle_export_zones,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "import_zones",
+        handle_import_zones,
+        schema=IMPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    return True
+
+
+async def _async_restore_zone_states(
+    hass: HomeAssistant, entry: ConfigEntry, zone_id: str
+) -> None:
+    """Restore and drop the saved states of a zone."""
+    data = hass.data[DOMAIN][entry.entry_id]
+
+    if zone_id not in data["saved_states"]:
+        _LOGGER.warning("No saved states found for zone '%s'", zone_id)
+        return
+
+    saved = data["saved_states"].pop(zone_id)
+    data["store"].async_schedule_save()
+    zone_name = entry.data.get("zones", {}).get(zone_id, {}).get("name", zone_id)
+    trace = new_trace(zone_id, zone_name, "restore_zone_states")
+    try:
+        # Batched per service group (or one scene.apply for attribute
+        # snapshots), skipping entities that never changed
+        failures: list[Failure] = []
+        trace["skipped"] = await async_restore_snapshot(
+            hass, saved, trace["calls"], failures
+        )
+        trace["result"] = "restored"
+        if failures:
+            # Entities that did not switch keep their snapshot for another try
+            data["saved_states"].setdefault(zone_id, {}).update(
+                failed_snapshot(saved, failures)
+            )
+            data["store"].async_schedule_save()
+            trace["failures"] = failures_trace(failures)
+            for failure in failures:
+                _LOGGER.warning(
+                    "Zone '%s': restoring %s.%s failed for %d entities: %s",
+                    zone_name, failure.domain, failure.service,
+                    len(failure.entity_ids), failure.error,
+                )
+    except Exception as err:
+        trace["result"] = "error"
+        trace["error"] = str(err)
+        raise
+    finally:
+        data["traces"].add(trace)
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply config entry changes to the running integration."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    data["rate_limiter"].async_update(entry.data.get("rate_limits", {}))
+
+    # Zones are added and removed in place; other zones keep running and
+    # keep their snapshots
+    zones = entry.data.get("zones", {})
+    previous = data["zones"]
+    added = [zone_id for zone_id in zones if zone_id not in previous]
+    removed = [zone_id for zone_id in previous if zone_id not in zones]
+    # Compared against the copy of the last applied zones; flows store
+    # new zone dicts, so an edit is never hidden by in-place mutation
+    edited = [
+        zone_id for zone_id in zones
+        if zone_id in previous and previous[zone_id] != zones[zone_id]
+    ]
+    data["zones"] = dict(zones)
+    for zone_id in removed:
+        await _async_remove_zone(hass, entry, zone_id)
+    if added:
+        async_dispatcher_send(hass, SIGNAL_ZONES_ADDED.format(entry.entry_id), added)
+
+    # Push edited definitions into their running switches
+    for zone_id in edited:
+        zone = data["zone_entities"].get(zone_id)
+        if zone is not None:
+            zone.async_zone_config_updated()
+
+
+async def _async_remove_zone(hass: HomeAssistant, entry: ConfigEntry, zone_id: str) -> None:
+    """Restore a deleted zone if it is active, then remove its entities."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    zone = data["zone_entities"].get(zone_id)
+    if zone is not None:
+        # Goes through the zone's serialized toggle path, so in-flight
+        # activations are cancelled and the snapshot is restored first.
+        # A failing restore must not keep the deleted zone around or stop
+        # the rest of the config update.
+        try:
+            await zone.async_turn_off()
+        except Exception:  # noqa: BLE001
+            _LOGGER.exception("Error restoring deleted zone '%s'", zone_id)
+    if data["saved_states"].pop(zone_id, None) is not None:
+        data["store"].async_schedule_save()
+    data["timings"].pop(zone_id, None)
+    data["scheduler"].async_cancel(zone_id)
+    async_dispatcher_send(hass, SIGNAL_ZONE_REMOVED.format(entry.entry_id), zone_id)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload config entry."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if data:
+            data["retry_queue"].async_shutdown()
+            data["scheduler"].async_shutdown()
+            await data["store"].async_flush()
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted saved states along with the config entry."""
+    await GuestModeStore(hass, entry.entry_id).async_remove()
\ No newline at end of file
@@ -1,386 +1,553 @@
-"""Config flow for Guest Mode integration."""
-from __future__ import annotations
-
-import logging
-
-import voluptuous as vol
-from homeassistant import config_entries
-from homeassistant.core import callback
-import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers import selector
-from homeassistant.helpers.entity_registry import async_get as er_async_get
-
-from .const import (
-    DOMAIN,
-    CONF_ZONE_NAME,
-    CONF_AUTOMATIONS_OFF,
-    CONF_AUTOMATIONS_ON,
-    CONF_SCRIPTS_OFF,
-    CONF_SCRIPTS_ON,
-    CONF_ENTITIES_OFF,
-    CONF_ENTITIES_ON,
-    CONF_WIFI_ENTITY,
-    CONF_WIFI_MODE,
-)
-
-_LOGGER = logging.getLogger(__name__)
-
-# ---------------------------------------------------------------------------
-# Reusable entity selectors (searchable, fast — no manual options dict needed)
-# ---------------------------------------------------------------------------
-
-_SELECTOR_AUTOMATIONS = selector.EntitySelector(
-    selector.EntitySelectorConfig(domain="automation", multiple=True)
-)
-_SELECTOR_SCRIPTS = selector.EntitySelector(
-    selector.EntitySelectorConfig(domain="script", multiple=True)
-)
-_SELECTOR_ENTITIES = selector.EntitySelector(
-    selector.EntitySelectorConfig(multiple=True)
-)
-_SELECTOR_WIFI = selector.EntitySelector(
-    selector.EntitySelectorConfig(multiple=False)
-)
-
-
-def _zone_schema(defaults: dict | None = None, exclude_entities: list[str] | None = None) -> vol.Schema:
-    """Return the zone add/edit schema with optional pre-filled defaults.
-
-    exclude_entities: entity IDs to hide from the general entity picker.
-    Zone dicts store the human name under key "name"; CONF_ZONE_NAME is the
-    form field name — handle both so edit pre-population works correctly.
-    """
-    d = defaults or {}
-    # Zones are persisted with key "name"; the form field is CONF_ZONE_NAME ("zone_name")
-    name_default = d.get("name", d.get(CONF_ZONE_NAME, ""))
-
-    if exclude_entities:
-        entities_selector = selector.EntitySelector(
-            selector.EntitySelectorConfig(
-                multiple=True,
-                exclude_entities=exclude_entities,
-            )
-        )
-    else:
-        entities_selector = _SELECTOR_ENTITIES
-
-    return vol.Schema(
-        {
-            vol.Required(CONF_ZONE_NAME, default=name_default): cv.string,
-            vol.Optional(CONF_AUTOMATIONS_OFF, default=d.get(CONF_AUTOMATIONS_OFF, [])): _SELECTOR_AUTOMATIONS,
-            vol.Optional(CONF_AUTOMATIONS_ON,  default=d.get(CONF_AUTOMATIONS_ON,  [])): _SELECTOR_AUTOMATIONS,
-            vol.Optional(CONF_SCRIPTS_OFF,     default=d.get(CONF_SCRIPTS_OFF,     [])): _SELECTOR_SCRIPTS,
-            vol.Optional(CONF_SCRIPTS_ON,      default=d.get(CONF_SCRIPTS_ON,      [])): _SELECTOR_SCRIPTS,
-            vol.Optional(CONF_ENTITIES_OFF,    default=d.get(CONF_ENTITIES_OFF,    [])): entities_selector,
-            vol.Optional(CONF_ENTITIES_ON,     default=d.get(CONF_ENTITIES_ON,     [])): entities_selector,
-        }
-    )
-
-
-def _wifi_schema(defaults: dict | None = None) -> vol.Schema:
-    d = defaults or {}
-    return vol.Schema(
-        {
-            vol.Optional(CONF_WIFI_ENTITY, default=d.get("entity", vol.UNDEFINED)): _SELECTOR_WIFI,
-            vol.Optional(CONF_WIFI_MODE,   default=d.get("mode", "off")): selector.SelectSelector(
-                selector.SelectSelectorConfig(
-                    options=["on", "off"],
-                    translation_key="wifi_mode",
-                )
-            ),
-        }
-    )
-
-
-# ---------------------------------------------------------------------------
-# Config flow (initial setup)
-# ---------------------------------------------------------------------------
-
-class GuestModeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    """Config flow for Guest Mode."""
-
-    VERSION = 1
-
-    def __init__(self) -> None:
-        self.zones: dict = {}
-        self.global_wifi: dict = {}
-
-    def _guest_mode_entity_ids(self) -> list[str]:
-        """Return all switch entity IDs belonging to this integration."""
-        return [
-            eid
-            for eid in self.hass.states.async_entity_ids("switch")
-            if eid.startswith("switch.guest_mode")
-        ]
-
-    async def async_step_user(self, user_input=None):
-        """Main setup menu."""
-        if user_input is not None:
-            action = user_input.get("action")
-            if action == "setup":
-                return await self.async_step_add_zone()
-            if action == "setup_wifi":
-                return await self.async_step_setup_wifi()
-            if action == "done":
-                return self.async_create_entry(
-                    title="Guest Mode",
-                    data={"zones": self.zones, "global_wifi": self.global_wifi},
-                )
-
-        return self.async_show_form(
-            step_id="user",
-            data_schema=vol.Schema(
-                {vol.Required("action"): selector.SelectSelector(
-                    selector.SelectSelectorConfig(
-                        options=["setup", "setup_wifi", "done"],
-                        translation_key="action",
-                    )
-                )}
-            ),
-        )
-
-    async def async_step_add_zone(self, user_input=None):
-        """Add a zone during initial setup."""
-        errors: dict[str, str] = {}
-
-        if user_input is not None:
-            zone_name = user_input.get(CONF_ZONE_NAME, "").strip()
-            if not zone_name:
-                errors[CONF_ZONE_NAME] = "zone_name_required"
-            else:
-                zone_id = zone_name.lower().replace(" ", "_")
-                self.zones[zone_id] = {
-                    "name": zone_name,
-                    CONF_AUTOMATIONS_OFF: user_input.get(CONF_AUTOMATIONS_OFF, []),
-                    CONF_AUTOMATIONS_ON:  user_input.get(CONF_AUTOMATIONS_ON,  []),
-                    CONF_SCRIPTS_OFF:     user_input.get(CONF_SCRIPTS_OFF,     []),
-                    CONF_SCRIPTS_ON:      user_input.get(CONF_SCRIPTS_ON,      []),
-                    CONF_ENTITIES_OFF:    user_input.get(CONF_ENTITIES_OFF,    []),
-                    CONF_ENTITIES_ON:     user_input.get(CONF_ENTITIES_ON,     []),
-                }
-                if user_input.get("add_another"):
-                    return await self.async_step_add_zone()
-                return await self.async_step_user()
-
-        schema = _zone_schema(exclude_entities=self._guest_mode_entity_ids())
-        schema = schema.extend(
-            {vol.Optional("add_another", default=False): cv.boolean}
-        )
-
-        return self.async_show_form(
-            step_id="add_zone",
-            data_schema=schema,
-            errors=errors,
-        )
-
-    async def async_step_setup_wifi(self, user_input=None):
-        """Configure global WiFi."""
-        if user_input is not None:
-            self.global_wifi = {
-                "entity": user_input.get(CONF_WIFI_ENTITY),
-                "mode":   user_input.get(CONF_WIFI_MODE, "off"),
-            }
-            return await self.async_step_user()
-
-        return self.async_show_form(
-            step_id="setup_wifi",
-            data_schema=_wifi_schema(),
-        )
-
-    @staticmethod
-    @callback
-    def async_get_options_flow(config_entry):
-        return GuestModeOptionsFlow(config_entry)
-
-
-# ---------------------------------------------------------------------------
-# Options flow (reconfigure after setup)
-# ---------------------------------------------------------------------------
-
-class GuestModeOptionsFlow(config_entries.OptionsFlow):
-    """Options flow for Guest Mode."""
-
-    def __init__(self, config_entry) -> None:
-        self._config_entry = config_entry
-        self.zones: dict = dict(config_entry.data.get("zones", {}))
-        self.global_wifi: dict = dict(config_entry.data.get("global_wifi", {}))
-        self.zone_to_edit: str | None = None
-
-    def _guest_mode_entity_ids(self) -> list[str]:
-        """Return all switch entity IDs belonging to this integration."""
-        return [
-            eid
-            for eid in self.hass.states.async_entity_ids("switch")
-            if eid.startswith("switch.guest_mode")
-        ]
-
-    # ------------------------------------------------------------------
-    # Helpers
-    # ------------------------------------------------------------------
-
-    def _save(self) -> None:
-        """Persist current state back to the config entry."""
-        self.hass.config_entries.async_update_entry(
-            self._config_entry,
-            data={"zones": self.zones, "global_wifi": self.global_wifi},
-        )
-
-    # ------------------------------------------------------------------
-    # Steps
-    # ------------------------------------------------------------------
-
-    async def async_step_init(self, user_input=None):
-        return await self.async_step_manage_menu()
-
-    async def async_step_manage_menu(self, user_input=None):
-        """Main management menu."""
-        if user_input is not None:
-            action = user_input.get("action")
-            zone_id = user_input.get("zone_select")
-
-            if action == "add":
-                return await self.async_step_add_zone()
-
-            elif action == "edit":
-                if not zone_id:
-                    return await self.async_step_manage_menu()
-                self.zone_to_edit = zone_id
-                return await self.async_step_edit_zone()
-
-            elif action == "delete":
-                if zone_id and zone_id in self.zones:
-                    # Remove the switch entity from the registry immediately so it
-                    # doesn't show as "no longer provided" after reload
-                    entity_reg = er_async_get(self.hass)
-                    switch_entity_id = f"switch.guest_mode_{zone_id}"
-                    entry = entity_reg.async_get(switch_entity_id)
-                    if entry:
-                        entity_reg.async_remove(switch_entity_id)
-                    self.zones.pop(zone_id)
-                    self._save()
-                    await self.hass.config_entries.async_reload(
-                        self._config_entry.entry_id
-                    )
-                    return self.async_abort(reason="reconfigure_successful")
-                return await self.async_step_manage_menu()
-
-            elif action in ("edit_wifi", "setup_wifi"):
-                return await self.async_step_edit_global_wifi()
-
-            elif action == "done":
-                self._save()
-                return self.async_abort(reason="reconfigure_successful")
-
-        wifi_configured = bool(self.global_wifi and self.global_wifi.get("entity"))
-        wifi_action = "edit_wifi" if wifi_configured else "setup_wifi"
-
-        if self.zones:
-            zone_choices = {z_id: z["name"] for z_id, z in self.zones.items()}
-            first_zone = next(iter(zone_choices))
-            actions = ["add", "edit", "delete", wifi_action, "done"]
-            schema = vol.Schema(
-                {
-                    vol.Required("action"): selector.SelectSelector(
-                        selector.SelectSelectorConfig(
-                            options=actions, translation_key="action"
-                        )
-                    ),
-                    vol.Optional("zone_select", default=first_zone): selector.SelectSelector(
-                        selector.SelectSelectorConfig(
-                            options=[
-                                {"value": k, "label": v}
-                                for k, v in zone_choices.items()
-                            ]
-                        )
-                    ),
-                }
-            )
-        else:
-            actions = ["add", wifi_action, "done"]
-            schema = vol.Schema(
-                {
-                    vol.Required("action"): selector.SelectSelector(
-                        selector.SelectSelectorConfig(
-                            options=actions, translation_key="action"
-                        )
-                    ),
-                }
-            )
-
-        return self.async_show_form(step_id="manage_menu", data_schema=schema)
-
-    async def async_step_edit_global_wifi(self, user_input=None):
-        """Edit WiFi settings."""
-        if user_input is not None:
-            self.global_wifi = {
-                "entity": user_input.get(CONF_WIFI_ENTITY),
-                "mode":   user_input.get(CONF_WIFI_MODE, "off"),
-            }
-            self._save()
-            return await self.async_step_manage_menu()
-
-        return self.async_show_form(
-            step_id="edit_global_wifi",
-            data_schema=_wifi_schema(self.global_wifi),
-        )
-
-    async def async_step_add_zone(self, user_input=None):
-        """Add a new zone."""
-        errors: dict[str, str] = {}
-
-        if user_input is not None:
-            zone_name = user_input.get(CONF_ZONE_NAME, "").strip()
-            if not zone_name:
-                errors[CONF_ZONE_NAME] = "zone_name_required"
-            else:
-                zone_id = zone_name.lower().replace(" ", "_")
-                self.zones[zone_id] = {
-                    "name": zone_name,
-                    CONF_AUTOMATIONS_OFF: user_input.get(CONF_AUTOMATIONS_OFF, []),
-                    CONF_AUTOMATIONS_ON:  user_input.get(CONF_AUTOMATIONS_ON,  []),
-                    CONF_SCRIPTS_OFF:     user_input.get(CONF_SCRIPTS_OFF,     []),
-                    CONF_SCRIPTS_ON:      user_input.get(CONF_SCRIPTS_ON,      []),
-                    CONF_ENTITIES_OFF:    user_input.get(CONF_ENTITIES_OFF,    []),
-                    CONF_ENTITIES_ON:     user_input.get(CONF_ENTITIES_ON,     []),
-                }
-                self._save()
-                # Reload to create the new switch entity, then close the flow
-                await self.hass.config_entries.async_reload(
-                    self._config_entry.entry_id
-                )
-                return self.async_abort(reason="reconfigure_successful")
-
-        return self.async_show_form(
-            step_id="add_zone",
-            data_schema=_zone_schema(exclude_entities=self._guest_mode_entity_ids()),
-            errors=errors,
-        )
-
-    async def async_step_edit_zone(self, user_input=None):
-        """Edit an existing zone."""
-        errors: dict[str, str] = {}
-        zone = self.zones[self.zone_to_edit]
-
-        if user_input is not None:
-            zone_name = user_input.get(CONF_ZONE_NAME, "").strip()
-            if not zone_name:
-                errors[CONF_ZONE_NAME] = "zone_name_required"
-            else:
-                self.zones[self.zone_to_edit] = {
-                    "name": zone_name,
-                    CONF_AUTOMATIONS_OFF: user_input.get(CONF_AUTOMATIONS_OFF, []),
-                    CONF_AUTOMATIONS_ON:  user_input.get(CONF_AUTOMATIONS_ON,  []),
-                    CONF_SCRIPTS_OFF:     user_input.get(CONF_SCRIPTS_OFF,     []),
-                    CONF_SCRIPTS_ON:      user_input.get(CONF_SCRIPTS_ON,      []),
-                    CONF_ENTITIES_OFF:    user_input.get(CONF_ENTITIES_OFF,    []),
-                    CONF_ENTITIES_ON:     user_input.get(CONF_ENTITIES_ON,     []),
-                }
-                self._save()
-                # No reload needed for edits — switch will pick up data on next trigger
-                return await self.async_step_manage_menu()
-
-        return self.async_show_form(
-            step_id="edit_zone",
-            data_schema=_zone_schema(zone, exclude_entities=self._guest_mode_entity_ids()),
-            errors=errors,
+"""Config flow for Guest Mode integration."""
+from __future__ import annotations
+
+import logging
+
+import voluptuous as vol
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import selector
+from homeassistant.helpers.entity_registry import (
+    async_entries_for_config_entry,
+    async_get as er_async_get,
+)
+
+from .const import (
+    DOMAIN,
+    CONF_ZONE_NAME,
+    CONF_AUTOMATIONS_OFF,
+    CONF_AUTOMATIONS_ON,
+    CONF_SCRIPTS_OFF,
+    CONF_SCRIPTS_ON,
+    CONF_ENTITIES_OFF,
+    CONF_ENTITIES_ON,
+    CONF_WIFI_ENTITY,
+    CONF_WIFI_MODE,
+    CONF_MAX_PARALLEL,
+    CONF_AUTOMATIONS_FIRST,
+    CONF_SNAPSHOT_MODE,
+    CONF_COALESCE_WINDOW,
+    CONF_ATOMIC,
+    CONF_ERROR_THRESHOLD,
+    CONF_CONFIRM,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_DURATION,
+    CONF_ENFORCE,
+    CONF_AREAS,
+    CONF_FLOORS,
+    CONF_LABELS,
+    CONF_DEVICE_CLASSES,
+    CONF_MEMBERS_MODE,
+    CONF_INTEGRATION,
+    CONF_RATE,
+    CONF_BURST,
+    DEFAULT_MAX_PARALLEL,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_BURST,
+    DEFAULT_ERROR_THRESHOLD,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_DURATION,
+)
+from .snapshot import SNAPSHOT_MODE_FULL, SNAPSHOT_MODE_STATE
+
+_LOGGER = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Reusable entity selectors (searchable, fast — no manual options dict needed)
+# ---------------------------------------------------------------------------
+
+_SELECTOR_AUTOMATIONS = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="automation", multiple=True)
+)
+_SELECTOR_SCRIPTS = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="script", multiple=True)
+)
+_SELECTOR_ENTITIES = selector.EntitySelector(
+    selector.EntitySelectorConfig(multiple=True)
+)
+_SELECTOR_WIFI = selector.EntitySelector(
+    selector.EntitySelectorConfig(multiple=False)
+)
+_SELECTOR_MAX_PARALLEL = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=1, max=10, step=1, mode=selector.NumberSelectorMode.BOX)
+)
+_SELECTOR_COALESCE_WINDOW = selector.NumberSelector(
+    selector.NumberSelectorConfig(
+        min=0, max=30, step=0.5, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX
+    )
+)
+_SELECTOR_ERROR_THRESHOLD = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=0, max=1000, step=1, mode=selector.NumberSelectorMode.BOX)
+)
+_SELECTOR_CONFIRM_TIMEOUT = selector.NumberSelector(
+    selector.NumberSelectorConfig(
+        min=1, max=300, step=1, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX
+    )
+)
+# Up to 30 days; 0 disables the automatic expiry
+_SELECTOR_DURATION = selector.NumberSelector(
+    selector.NumberSelectorConfig(
+        min=0, max=43200, step=1, unit_of_measurement="min", mode=selector.NumberSelectorMode.BOX
+    )
+)
+_SELECTOR_SNAPSHOT_MODE = selector.SelectSelector(
+    selector.SelectSelectorConfig(
+        options=[SNAPSHOT_MODE_STATE, SNAPSHOT_MODE_FULL],
+        translation_key="snapshot_mode",
+    )
+)
+_SELECTOR_AREAS = selector.AreaSelector(selector.AreaSelectorConfig(multiple=True))
+# Floors and labels exist since Home Assistant 2024.4
+_SELECTOR_FLOORS = (
+    selector.FloorSelector(selector.FloorSelectorConfig(multiple=True))
+    if hasattr(selector, "FloorSelector") else None
+)
+_SELECTOR_LABELS = (
+    selector.LabelSelector(selector.LabelSelectorConfig(multiple=True))
+    if hasattr(selector, "LabelSelector") else None
+)
+_SELECTOR_DEVICE_CLASSES = selector.SelectSelector(
+    selector.SelectSelectorConfig(
+        options=[
+            "outlet", "switch", "awning", "blind", "curtain", "damper", "door",
+            "garage", "gate", "shade", "shutter", "window", "humidifier", "dehumidifier",
+        ],
+        multiple=True,
+        custom_value=True,
+    )
+)
+_SELECTOR_MEMBERS_MODE = selector.SelectSelector(
+    selector.SelectSelectorConfig(options=["off", "on"], translation_key="members_mode")
+)
+
+
+def _zone_schema(defaults: dict | None = None, exclude_entities: list[str] | None = None) -> vol.Schema:
+    """Return the zone add/edit schema with optional pre-filled defaults.
+
+    exclude_entities: entity IDs to hide from the general entity picker.
+    Zone dicts store the human name under key "name"; CONF_ZONE_NAME is the
+    form field name — handle both so edit pre-population works correctly.
+    """
+    d = defaults or {}
+    # Zones are persisted with key "name"; the form field is CONF_ZONE_NAME ("zone_name")
+    name_default = d.get("name", d.get(CONF_ZONE_NAME, ""))
+
+    if exclude_entities:
+        entities_selector = selector.EntitySelector(
+            selector.EntitySelectorConfig(
+                multiple=True,
+                exclude_entities=exclude_entities,
+            )
+        )
+    else:
+        entities_selector = _SELECTOR_ENTITIES
+
+    fields = {
+        vol.Required(CONF_ZONE_NAME, default=name_default): cv.string,
+        vol.Optional(CONF_AUTOMATIONS_OFF, default=d.get(CONF_AUTOMATIONS_OFF, [])): _SELECTOR_AUTOMATIONS,
+        vol.Optional(CONF_AUTOMATIONS_ON,  default=d.get(CONF_AUTOMATIONS_ON,  [])): _SELECTOR_AUTOMATIONS,
+        vol.Optional(CONF_SCRIPTS_OFF,     default=d.get(CONF_SCRIPTS_OFF,     [])): _SELECTOR_SCRIPTS,
+        vol.Optional(CONF_SCRIPTS_ON,      default=d.get(CONF_SCRIPTS_ON,      [])): _SELECTOR_SCRIPTS,
+        vol.Optional(CONF_ENTITIES_OFF,    default=d.get(CONF_ENTITIES_OFF,    [])): entities_selector,
+        vol.Optional(CONF_ENTITIES_ON,     default=d.get(CONF_ENTITIES_ON,     [])): entities_selector,
+        vol.Optional(CONF_AREAS,           default=d.get(CONF_AREAS,           [])): _SELECTOR_AREAS,
+    }
+    if _SELECTOR_FLOORS is not None:
+        fields[vol.Optional(CONF_FLOORS, default=d.get(CONF_FLOORS, []))] = _SELECTOR_FLOORS
+    if _SELECTOR_LABELS is not None:
+        fields[vol.Optional(CONF_LABELS, default=d.get(CONF_LABELS, []))] = _SELECTOR_LABELS
+    fields.update(
+        {
+            vol.Optional(CONF_DEVICE_CLASSES,    default=d.get(CONF_DEVICE_CLASSES,    [])): _SELECTOR_DEVICE_CLASSES,
+            vol.Optional(CONF_MEMBERS_MODE,      default=d.get(CONF_MEMBERS_MODE,      "off")): _SELECTOR_MEMBERS_MODE,
+            vol.Optional(CONF_MAX_PARALLEL,      default=d.get(CONF_MAX_PARALLEL,      DEFAULT_MAX_PARALLEL)): _SELECTOR_MAX_PARALLEL,
+            vol.Optional(CONF_AUTOMATIONS_FIRST, default=d.get(CONF_AUTOMATIONS_FIRST, False)): cv.boolean,
+            vol.Optional(CONF_SNAPSHOT_MODE,     default=d.get(CONF_SNAPSHOT_MODE,     SNAPSHOT_MODE_STATE)): _SELECTOR_SNAPSHOT_MODE,
+            vol.Optional(CONF_COALESCE_WINDOW,   default=d.get(CONF_COALESCE_WINDOW,   DEFAULT_COALESCE_WINDOW)): _SELECTOR_COALESCE_WINDOW,
+            vol.Optional(CONF_ATOMIC,            default=d.get(CONF_ATOMIC,            False)): cv.boolean,
+            vol.Optional(CONF_ERROR_THRESHOLD,   default=d.get(CONF_ERROR_THRESHOLD,   DEFAULT_ERROR_THRESHOLD)): _SELECTOR_ERROR_THRESHOLD,
+            vol.Optional(CONF_CONFIRM,           default=d.get(CONF_CONFIRM,           False)): cv.boolean,
+            vol.Optional(CONF_CONFIRM_TIMEOUT,   default=d.get(CONF_CONFIRM_TIMEOUT,   DEFAULT_CONFIRM_TIMEOUT)): _SELECTOR_CONFIRM_TIMEOUT,
+            vol.Optional(CONF_DURATION,          default=d.get(CONF_DURATION,          DEFAULT_DURATION)): _SELECTOR_DURATION,
+            vol.Optional(CONF_ENFORCE,           default=d.get(CONF_ENFORCE,           False)): cv.boolean,
+        }
+    )
+    return vol.Schema(fields)
+
+
+def _zone_from_input(zone_name: str, user_input: dict) -> dict:
+    """Build the persisted zone dict from a submitted zone form."""
+    return {
+        "name": zone_name,
+        CONF_AUTOMATIONS_OFF: user_input.get(CONF_AUTOMATIONS_OFF, []),
+        CONF_AUTOMATIONS_ON:  user_input.get(CONF_AUTOMATIONS_ON,  []),
+        CONF_SCRIPTS_OFF:     user_input.get(CONF_SCRIPTS_OFF,     []),
+        CONF_SCRIPTS_ON:      user_input.get(CONF_SCRIPTS_ON,      []),
+        CONF_ENTITIES_OFF:    user_input.get(CONF_ENTITIES_OFF,    []),
+        CONF_ENTITIES_ON:     user_input.get(CONF_ENTITIES_ON,     []),
+        CONF_AREAS:           user_input.get(CONF_AREAS,           []),
+        CONF_FLOORS:          user_input.get(CONF_FLOORS,          []),
+        CONF_LABELS:          user_input.get(CONF_LABELS,          []),
+        CONF_DEVICE_CLASSES:  user_input.get(CONF_DEVICE_CLASSES,  []),
+        CONF_MEMBERS_MODE:    user_input.get(CONF_MEMBERS_MODE,    "off"),
+        CONF_MAX_PARALLEL:      int(user_input.get(CONF_MAX_PARALLEL, DEFAULT_MAX_PARALLEL)),
+        CONF_AUTOMATIONS_FIRST: user_input.get(CONF_AUTOMATIONS_FIRST, False),
+        CONF_SNAPSHOT_MODE:     user_input.get(CONF_SNAPSHOT_MODE, SNAPSHOT_MODE_STATE),
+        CONF_COALESCE_WINDOW:   float(user_input.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW)),
+        CONF_ATOMIC:            user_input.get(CONF_ATOMIC, False),
+        CONF_ERROR_THRESHOLD:   int(user_input.get(CONF_ERROR_THRESHOLD, DEFAULT_ERROR_THRESHOLD)),
+        CONF_CONFIRM:           user_input.get(CONF_CONFIRM, False),
+        CONF_CONFIRM_TIMEOUT:   float(user_input.get(CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT)),
+        CONF_DURATION:          int(user_input.get(CONF_DURATION, DEFAULT_DURATION)),
+        CONF_ENFORCE:           user_input.get(CONF_ENFORCE, False),
+    }
+
+
+def _wifi_schema(defaults: dict | None = None) -> vol.Schema:
+    d = defaults or {}
+    return vol.Schema(
+        {
+            vol.Optional(CONF_WIFI_ENTITY, default=d.get("entity", vol.UNDEFINED)): _SELECTOR_WIFI,
+            vol.Optional(CONF_WIFI_MODE,   default=d.get("mode", "off")): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=["on", "off"],
+                    translation_key="wifi_mode",
+                )
+            ),
+        }
+    )
+
+
+def _integration_entity_ids(hass: HomeAssistant) -> list[str]:
+    """Return the entity IDs of all Guest Mode entities.
+
+    Read from the entity registry per config entry, so the cost does not
+    grow with the number of entities in the house and renamed entities are
+    still found.
+    """
+    registry = er_async_get(hass)
+    return [
+        entity.entity_id
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        for entity in async_entries_for_config_entry(registry, entry.entry_id)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Config flow (initial setup)
+# ---------------------------------------------------------------------------
+
+class GuestModeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Config flow for Guest Mode."""
+
+    VERSION = 1
+
+    def __init__(self) -> None:
+        self.zones: dict = {}
+        self.global_wifi: dict = {}
+        self._entity_ids: list[str] | None = None
+
+    def _guest_mode_entity_ids(self) -> list[str]:
+        """Return this integration's entity IDs, looked up once per flow."""
+        if self._entity_ids is None:
+            self._entity_ids = _integration_entity_ids(self.hass)
+        return self._entity_ids
+
+    async def async_step_user(self, user_input=None):
+        """Main setup menu."""
+        if user_input is not None:
+            action = user_input.get("action")
+            if action == "setup":
+                return await self.async_step_add_zone()
+            if action == "setup_wifi":
+                return await self.async_step_setup_wifi()
+            if action == "done":
+                return self.async_create_entry(
+                    title="Guest Mode",
+                    data={"zones": self.zones, "global_wifi": self.global_wifi},
+                )
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {vol.Required("action"): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=["setup", "setup_wifi", "done"],
+                        translation_key="action",
+                    )
+                )}
+            ),
+        )
+
+    async def async_step_add_zone(self, user_input=None):
+        """Add a zone during initial setup."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            zone_name = user_input.get(CONF_ZONE_NAME, "").strip()
+            if not zone_name:
+                errors[CONF_ZONE_NAME] = "zone_name_required"
+            else:
+                zone_id = zone_name.lower().replace(" ", "_")
+                self.zones[zone_id] = _zone_from_input(zone_name, user_input)
+                if user_input.get("add_another"):
+                    return await self.async_step_add_zone()
+                return await self.async_step_user()
+
+        schema = _zone_schema(exclude_entities=self._guest_mode_entity_ids())
+        schema = schema.extend(
+            {vol.Optional("add_another", default=False): cv.boolean}
+        )
+
+        return self.async_show_form(
+            step_id="add_zone",
+            data_schema=schema,
+            errors=errors,
+        )
+
+    async def async_step_setup_wifi(self, user_input=None):
+        """Configure global WiFi."""
+        if user_input is not None:
+            self.global_wifi = {
+                "entity": user_input.get(CONF_WIFI_ENTITY),
+                "mode":   user_input.get(CONF_WIFI_MODE, "off"),
+            }
+            return await self.async_step_user()
+
+        return self.async_show_form(
+            step_id="setup_wifi",
+            data_schema=_wifi_schema(),
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return GuestModeOptionsFlow(config_entry)
+
+
+# ---------------------------------------------------------------------------
+# Options flow (reconfigure after setup)
+# ---------------------------------------------------------------------------
+
+class GuestModeOptionsFlow(config_entries.OptionsFlow):
+    """Options flow for Guest Mode."""
+
+    def __init__(self, config_entry) -> None:
+        self._config_entry = config_entry
+        self.zones: dict = dict(config_entry.data.get("zones", {}))
+        self.global_wifi: dict = dict(config_entry.data.get("global_wifi", {}))
+        self.rate_limits: dict = dict(config_entry.data.get("rate_limits", {}))
+        self.zone_to_edit: str | None = None
+        self._entity_ids: list[str] | None = None
+
+    def _guest_mode_entity_ids(self) -> list[str]:
+        """Return this integration's entity IDs, looked up once per flow."""
+        if self._entity_ids is None:
+            self._entity_ids = _integration_entity_ids(self.hass)
+        return self._entity_ids
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _save(self) -> None:
+        """Persist current state back to the config entry.
+
+        Copies are stored, so later changes in this flow don't alter the
+        entry in place and are still detected (and saved) as changes.
+        """
+        self.hass.config_entries.async_update_entry(
+            self._config_entry,
+            data={
+                "zones": dict(self.zones),
+                "global_wifi": self.global_wifi,
+                "rate_limits": dict(self.rate_limits),
+            },
+        )
+        # Zones may have been added or removed
+        self._entity_ids = None
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+
+    async def async_step_init(self, user_input=None):
+        return await self.async_step_manage_menu()
+
+    async def async_step_manage_menu(self, user_input=None):
+        """Main management menu."""
+        if user_input is not None:
+            action = user_input.get("action")
+            zone_id = user_input.get("zone_select")
+
+            if action == "add":
+                return await self.async_step_add_zone()
+
+            elif action == "edit":
+                if not zone_id:
+                    return await self.async_step_manage_menu()
+                self.zone_to_edit = zone_id
+                return await self.async_step_edit_zone()
+
+            elif action == "delete":
+                if zone_id and zone_id in self.zones:
+                    # The update listener restores the zone if it is active
+                    # and removes its entities; other zones keep running
+                    self.zones.pop(zone_id)
+                    self._save()
+                    return self.async_abort(reason="reconfigure_successful")
+                return await self.async_step_manage_menu()
+
+            elif action in ("edit_wifi", "setup_wifi"):
+                return await self.async_step_edit_global_wifi()
+
+            elif action == "rate_limits":
+                return await self.async_step_rate_limits()
+
+            elif action == "done":
+                self._save()
+                return self.async_abort(reason="reconfigure_successful")
+
+        wifi_configured = bool(self.global_wifi and self.global_wifi.get("entity"))
+        wifi_action = "edit_wifi" if wifi_configured else "setup_wifi"
+
+        if self.zones:
+            zone_choices = {z_id: z["name"] for z_id, z in self.zones.items()}
+            first_zone = next(iter(zone_choices))
+            actions = ["add", "edit", "delete", wifi_action, "rate_limits", "done"]
+            schema = vol.Schema(
+                {
+                    vol.Required("action"): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=actions, translation_key="action"
+                        )
+                    ),
+                    vol.Optional("zone_select", default=first_zone): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                {"value": k, "label": v}
+                                for k, v in zone_choices.items()
+                            ]
+                        )
+                    ),
+                }
+            )
+        else:
+            actions = ["add", wifi_action, "rate_limits", "done"]
+            schema = vol.Schema(
+                {
+                    vol.Required("action"): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=actions, translation_key="action"
+                        )
+                    ),
+                }
+            )
+
+        return self.async_show_form(step_id="manage_menu", data_schema=schema)
+
+    async def async_step_edit_global_wifi(self, user_input=None):
+        """Edit WiFi settings."""
+        if user_input is not None:
+            self.global_wifi = {
+                "entity": user_input.get(CONF_WIFI_ENTITY),
+                "mode":   user_input.get(CONF_WIFI_MODE, "off"),
+            }
+            self._save()
+            return await self.async_step_manage_menu()
+
+        return self.async_show_form(
+            step_id="edit_global_wifi",
+            data_schema=_wifi_schema(self.global_wifi),
+        )
+
+    async def async_step_rate_limits(self, user_input=None):
+        """Set or clear the rate limit of one integration."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            integration = user_input.get(CONF_INTEGRATION, "").strip().lower()
+            rate = float(user_input.get(CONF_RATE, 0))
+            if not integration:
+                errors[CONF_INTEGRATION] = "integration_required"
+            else:
+                if rate > 0:
+                    self.rate_limits[integration] = {
+                        "rate":  rate,
+                        "burst": int(user_input.get(CONF_BURST, DEFAULT_BURST)),
+                    }
+                else:
+                    self.rate_limits.pop(integration, None)
+                self._save()
+                return await self.async_step_manage_menu()
+
+        current = ", ".join(
+            f"{name}: {limit['rate']}/s (burst {limit['burst']})"
+            for name, limit in self.rate_limits.items()
+        ) or "-"
+        return self.async_show_form(
+            step_id="rate_limits",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_INTEGRATION): cv.string,
+                    vol.Optional(CONF_RATE, default=0): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0, max=100, step=0.5, mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(CONF_BURST, default=DEFAULT_BURST): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1, max=100, step=1, mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                }
+            ),
+            description_placeholders={"current": current},
+            errors=errors,
+        )
+
+    async def async_step_add_zone(self, user_input=None):
+        """Add a new zone."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            zone_name = user_input.get(CONF_ZONE_NAME, "").strip()
+            if not zone_name:
+                errors[CONF_ZONE_NAME] = "zone_name_required"
+            else:
+                zone_id = zone_name.lower().replace(" ", "_")
+                self.zones[zone_id] = _zone_from_input(zone_name, user_input)
+                # The update listener adds the new zone's entities without
+                # reloading the other zones
+                self._save()
+                return self.async_abort(reason="reconfigure_successful")
+
+        return self.async_show_form(
+            step_id="add_zone",
+            data_schema=_zone_schema(exclude_entities=self._guest_mode_entity_ids()),
+            errors=errors,
+        )
+
+    async def async_step_edit_zone(self, user_input=None):
+        """Edit an existing zone."""
+        errors: dict[str, str] = {}
+        zone = self.zones[self.zone_to_edit]
+
+        if user_input is not None:
+            zone_name = user_input.get(CONF_ZONE_NAME, "").strip()
+            if not zone_name:
+                errors[CONF_ZONE_NAME] = "zone_name_required"
+            else:
+                self.zones[self.zone_to_edit] = _zone_from_input(zone_name, user_input)
+                self._save()
+                # No reload needed for edits — the update listener pushes the
+                # new definition into the live switch, which re-syncs the
+                # zone if it is active
+                return await self.async_step_manage_menu()
+
+        return self.async_show_form(
+            step_id="edit_zone",
+            data_schema=_zone_schema(zone, exclude_entities=self._guest_mode_entity_ids()),
+            errors=errors,
         )
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Completion confirmation of zone activations for Guest Mode integration."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .helpers import Phase, is_satisfied
+
+# Scripts only report "on" while running, so there is no state to wait for
+_UNCONFIRMABLE_DOMAINS = ("script",)
+
+
+class CompletionTracker:
+    """Waits for dispatched entities to reach their target state.
+
+    A single state-change subscription covers exactly the tracked entities;
+    it must be created before the calls are dispatched so no change is
+    missed.
+    """
+
+    def __init__(self, hass: HomeAssistant, stages: list[list[Phase]]) -> None:
+        self.hass = hass
+        # entity_id -> service it must satisfy; covers still opening or
+        # closing are only confirmed once they settle
+        self._pending: dict[str, str] = {}
+        for stage in stages:
+            for phase in stage:
+                for entity_id in phase.entity_ids:
+                    if entity_id.split(".", 1)[0] not in _UNCONFIRMABLE_DOMAINS:
+                        self._pending[entity_id] = phase.service
+        self._start = time.monotonic()
+        self._done: asyncio.Future[None] = hass.loop.create_future()
+        self._unsub = (
+            async_track_state_change_event(hass, list(self._pending), self._async_changed)
+            if self._pending else None
+        )
+
+    @callback
+    def _async_changed(self, event: Event) -> None:
+        entity_id = event.data["entity_id"]
+        new_state = event.data["new_state"]
+        service = self._pending.get(entity_id)
+        if service is None or new_state is None or not is_satisfied(new_state.state, service):
+            return
+        del self._pending[entity_id]
+        self._async_check_done()
+
+    @callback
+    def _async_check_done(self) -> None:
+        if not self._pending and not self._done.done():
+            self._done.set_result(None)
+
+    @callback
+    def async_discard(self, entity_ids: list[str]) -> None:
+        """Stop waiting for entities (e.g. because their call failed)."""
+        for entity_id in entity_ids:
+            self._pending.pop(entity_id, None)
+        self._async_check_done()
+
+    async def async_wait(self, timeout: float) -> tuple[float | None, int]:
+        """Wait for all targets.
+
+        Returns (seconds from dispatch to consistency or None on timeout,
+        number of entities that never reached their target).
+        """
+        try:
+            # Entities that were already in state by the time we got here
+            for entity_id, service in list(self._pending.items()):
+                state = self.hass.states.get(entity_id)
+                if state is not None and is_satisfied(state.state, service):
+                    del self._pending[entity_id]
+            self._async_check_done()
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._done
+            except TimeoutError:
+                return None, len(self._pending)
+            return time.monotonic() - self._start, 0
+        finally:
+            self.async_cancel()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the state-change subscription."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
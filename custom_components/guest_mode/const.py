@@ -1,13 +1,43 @@
-"""Constants for Guest Mode integration."""
-
-DOMAIN = "guest_mode"
-
-CONF_ZONE_NAME = "zone_name"
-CONF_AUTOMATIONS_OFF = "automations_off"
-CONF_AUTOMATIONS_ON = "automations_on"
-CONF_SCRIPTS_OFF = "scripts_off"
-CONF_SCRIPTS_ON = "scripts_on"
-CONF_ENTITIES_OFF = "entities_off"
-CONF_ENTITIES_ON = "entities_on"
-CONF_WIFI_ENTITY = "wifi_entity"
-CONF_WIFI_MODE = "wifi_mode"
\ No newline at end of file
+"""Constants for Guest Mode integration."""
+
+DOMAIN = "guest_mode"
+
+CONF_ZONE_NAME = "zone_name"
+CONF_AUTOMATIONS_OFF = "automations_off"
+CONF_AUTOMATIONS_ON = "automations_on"
+CONF_SCRIPTS_OFF = "scripts_off"
+CONF_SCRIPTS_ON = "scripts_on"
+CONF_ENTITIES_OFF = "entities_off"
+CONF_ENTITIES_ON = "entities_on"
+CONF_WIFI_ENTITY = "wifi_entity"
+CONF_WIFI_MODE = "wifi_mode"
+CONF_MAX_PARALLEL = "max_parallel"
+CONF_AUTOMATIONS_FIRST = "automations_first"
+CONF_SNAPSHOT_MODE = "snapshot_mode"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_ATOMIC = "atomic"
+CONF_ERROR_THRESHOLD = "error_threshold"
+CONF_CONFIRM = "confirm"
+CONF_CONFIRM_TIMEOUT = "confirm_timeout"
+CONF_AREAS = "areas"
+CONF_FLOORS = "floors"
+CONF_LABELS = "labels"
+CONF_DEVICE_CLASSES = "device_classes"
+CONF_MEMBERS_MODE = "members_mode"
+CONF_DURATION = "duration"
+CONF_ENFORCE = "enforce"
+CONF_INTEGRATION = "integration"
+CONF_RATE = "rate"
+CONF_BURST = "burst"
+
+DEFAULT_MAX_PARALLEL = 4
+DEFAULT_COALESCE_WINDOW = 0
+DEFAULT_BURST = 5
+DEFAULT_ERROR_THRESHOLD = 0
+DEFAULT_CONFIRM_TIMEOUT = 10
+DEFAULT_DURATION = 0
+
+# Dispatcher signals, formatted with the config entry ID
+SIGNAL_TIMINGS_UPDATED = f"{DOMAIN}_timings_updated_{{}}"
+SIGNAL_ZONES_ADDED = f"{DOMAIN}_zones_added_{{}}"
+SIGNAL_ZONE_REMOVED = f"{DOMAIN}_zone_removed_{{}}"
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""Diagnostics support for Guest Mode integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the configuration, runtime state and recent traces."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    zones = entry.data.get("zones", {})
+    return {
+        "zones": zones,
+        "global_wifi": entry.data.get("global_wifi", {}),
+        "rate_limits": entry.data.get("rate_limits", {}),
+        "active_zones": sorted(data["active_zones"]),
+        "saved_entities": {
+            zone_id: len(saved) for zone_id, saved in data["saved_states"].items()
+        },
+        "pending_retries": {
+            zone_id: data["retry_queue"].pending(zone_id) for zone_id in zones
+        },
+        "schedules": {
+            zone_id: data["scheduler"].scheduled(zone_id) for zone_id in zones
+        },
+        "traces": [_trace_ms(trace) for trace in data["traces"].as_list()],
+    }
+
+
+def _trace_ms(trace: dict[str, Any]) -> dict[str, Any]:
+    """Copy a trace with its phase timings in milliseconds."""
+    result = dict(trace)
+    if "timings" in trace:
+        result["timings_ms"] = {
+            phase: round(seconds * 1000, 1)
+            for phase, seconds in result.pop("timings").items()
+        }
+    return result
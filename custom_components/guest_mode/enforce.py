@@ -0,0 +1,168 @@
+"""Drift enforcement of active Guest Mode zones."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import logging
+import time
+from typing import Any, Callable
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+
+from .helpers import Failure, group_calls, is_satisfied, is_transitional, needs_change
+from .ownership import OwnershipIndex
+from .ratelimit import RateLimiter
+
+_LOGGER = logging.getLogger(__name__)
+
+# Scripts only report "on" while running, so there is no state to enforce
+_UNENFORCEABLE_DOMAINS = ("script",)
+# States that say nothing about the device (e.g. while its integration loads)
+_IGNORED_STATES = frozenset((STATE_UNAVAILABLE, STATE_UNKNOWN))
+
+# Drift within this many seconds is corrected in one pass
+ENFORCE_DELAY = 2
+# Corrections per entity within ENFORCE_WINDOW seconds before it is left alone
+ENFORCE_MAX_CORRECTIONS = 3
+ENFORCE_WINDOW = 300
+
+
+class DriftEnforcer:
+    """Puts the managed entities of an active zone back into their target state.
+
+    A single state-change subscription covers exactly the managed entities.
+    Drifted entities are collected for ``ENFORCE_DELAY`` seconds and then
+    corrected with one grouped, rate-shaped call per service. An entity that
+    needed ``ENFORCE_MAX_CORRECTIONS`` corrections within ``ENFORCE_WINDOW``
+    is left alone until the window has passed, so a device that keeps
+    fighting back cannot cause a command storm. Entities another zone took
+    over with a different target are not touched.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        zone_id: str,
+        name: str,
+        targets: dict[str, str],
+        owners: OwnershipIndex,
+        limiter: RateLimiter,
+        on_corrected: Callable[[dict[tuple[str, str], list[str]], list[Failure]], None],
+    ) -> None:
+        self.hass = hass
+        self.zone_id = zone_id
+        self.name = name
+        self._targets = {
+            entity_id: service
+            for entity_id, service in targets.items()
+            if entity_id.split(".", 1)[0] not in _UNENFORCEABLE_DOMAINS
+        }
+        self._owners = owners
+        self._limiter = limiter
+        self._on_corrected = on_corrected
+        self._drifted: dict[str, None] = {}
+        # entity_id -> monotonic times of its recent corrections
+        self._history: dict[str, deque[float]] = {}
+        # Entities at the cap whose warning was already logged
+        self._capped: set[str] = set()
+        self._unsub: CALLBACK_TYPE | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._task: asyncio.Task | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Subscribe to state changes of the managed entities."""
+        if self._targets and self._unsub is None:
+            self._unsub = async_track_state_change_event(
+                self.hass, list(self._targets), self._async_changed
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe and drop pending and in-flight corrections."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._drifted.clear()
+
+    @callback
+    def _async_changed(self, event: Event) -> None:
+        entity_id = event.data["entity_id"]
+        old_state = event.data["old_state"]
+        new_state = event.data["new_state"]
+        # Attribute-only updates (temperature reports, positions) are not drift
+        if new_state is None or (
+            old_state is not None and old_state.state == new_state.state
+        ):
+            return
+        # A cover that is opening or closing is judged once it settles
+        if (
+            new_state.state in _IGNORED_STATES
+            or is_transitional(new_state.state)
+            or is_satisfied(new_state.state, self._targets[entity_id])
+        ):
+            self._drifted.pop(entity_id, None)
+            return
+        self._drifted[entity_id] = None
+        self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        if self._unsub_timer is None:
+            self._unsub_timer = async_call_later(self.hass, ENFORCE_DELAY, self._async_flush)
+
+    @callback
+    def _async_flush(self, _now: Any) -> None:
+        self._unsub_timer = None
+        if self._task is not None and not self._task.done():
+            # One correction pass at a time; try again after this one
+            self._async_schedule()
+            return
+        now = time.monotonic()
+        corrections: list[tuple[str, str]] = []
+        for entity_id in self._drifted:
+            service = self._targets[entity_id]
+            if self._owners.target(entity_id) != service:
+                continue
+            if not needs_change(self.hass, entity_id, service):
+                continue
+            history = self._history.setdefault(entity_id, deque())
+            while history and now - history[0] > ENFORCE_WINDOW:
+                history.popleft()
+            if len(history) >= ENFORCE_MAX_CORRECTIONS:
+                if entity_id not in self._capped:
+                    self._capped.add(entity_id)
+                    _LOGGER.warning(
+                        "Zone '%s': %s keeps leaving its Guest Mode state, "
+                        "not correcting it for up to %d seconds",
+                        self.name, entity_id, ENFORCE_WINDOW,
+                    )
+                continue
+            self._capped.discard(entity_id)
+            history.append(now)
+            corrections.append((entity_id, service))
+        self._drifted.clear()
+        if corrections:
+            self._task = self.hass.async_create_task(
+                self._async_correct(group_calls(corrections))
+            )
+
+    async def _async_correct(self, groups: dict[tuple[str, str], list[str]]) -> None:
+        failures: list[Failure] = []
+        for (domain, service), entity_ids in groups.items():
+            await self._limiter.async_call(domain, service, entity_ids, {}, failures)
+        for failure in failures:
+            _LOGGER.warning(
+                "Zone '%s': correcting %s.%s failed for %d entities: %s",
+                self.name, failure.domain, failure.service,
+                len(failure.entity_ids), failure.error,
+            )
+        self._on_corrected(groups, failures)
@@ -0,0 +1,233 @@
+"""Shared service dispatch helpers for Guest Mode integration."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import time
+from typing import TYPE_CHECKING, Iterable
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant
+
+if TYPE_CHECKING:
+    from .ratelimit import RateLimiter
+
+# Domains that have their own turn_on/turn_off services; everything else goes
+# through the generic homeassistant.* services.
+_NATIVE_DOMAINS = ("automation", "script")
+
+# Live states that satisfy a turn_off target; every other settled state
+# (on, open, heat, playing, cleaning, ...) satisfies turn_on
+_OFF_STATES = frozenset(("off", "closed"))
+# States that say nothing about the device
+_UNKNOWN_STATES = frozenset((STATE_UNAVAILABLE, STATE_UNKNOWN))
+# Covers and valves still moving, with the service their motion fulfils
+_MOVING_STATES = {"opening": "turn_on", "closing": "turn_off"}
+
+
+def service_domain(entity_id: str) -> str:
+    """Return the service domain used to switch an entity on or off."""
+    domain = entity_id.split(".", 1)[0]
+    return domain if domain in _NATIVE_DOMAINS else "homeassistant"
+
+
+def target_service(state: str) -> str:
+    """Return the service that brings an entity back to a saved state."""
+    if state in _OFF_STATES or state in _UNKNOWN_STATES:
+        return "turn_off"
+    return _MOVING_STATES.get(state, "turn_on")
+
+
+def is_transitional(state: str) -> bool:
+    """Return True while a cover or valve is still opening or closing."""
+    return state in _MOVING_STATES
+
+
+def is_satisfied(state: str, service: str) -> bool:
+    """Return True if a settled live state satisfies a turn_on / turn_off.
+
+    Unknown and transitional states never do.
+    """
+    if state in _UNKNOWN_STATES or state in _MOVING_STATES:
+        return False
+    return (state in _OFF_STATES) == (service == "turn_off")
+
+
+def needs_change(hass: HomeAssistant, entity_id: str, service: str) -> bool:
+    """Return True unless the entity is already in the state a service targets.
+
+    A cover already moving towards the target needs no further command.
+    """
+    state = hass.states.get(entity_id)
+    if state is None:
+        return True
+    return not is_satisfied(state.state, service) and _MOVING_STATES.get(state.state) != service
+
+
+def group_calls(
+    targets: Iterable[tuple[str, str]],
+) -> dict[tuple[str, str], list[str]]:
+    """Group (entity_id, service) pairs by (service domain, service).
+
+    Each resulting group can be dispatched as a single service call with an
+    entity_id list instead of one call per entity.
+    """
+    groups: dict[tuple[str, str], list[str]] = {}
+    for entity_id, service in targets:
+        groups.setdefault((service_domain(entity_id), service), []).append(entity_id)
+    return groups
+
+
+def group_restore_calls(saved: dict[str, str]) -> dict[tuple[str, str], list[str]]:
+    """Group a saved-state snapshot into batched restore calls."""
+    return group_calls(
+        (entity_id, target_service(state)) for entity_id, state in saved.items()
+    )
+
+
+def diff_groups(
+    hass: HomeAssistant, groups: dict[tuple[str, str], list[str]]
+) -> tuple[dict[tuple[str, str], list[str]], int]:
+    """Drop entities already in their target state from grouped calls.
+
+    Returns the remaining groups and the number of skipped entity commands.
+    """
+    result: dict[tuple[str, str], list[str]] = {}
+    skipped = 0
+    for (domain, service), entity_ids in groups.items():
+        pending = [e for e in entity_ids if needs_change(hass, e, service)]
+        skipped += len(entity_ids) - len(pending)
+        if pending:
+            result[(domain, service)] = pending
+    return result, skipped
+
+
+async def async_call_grouped(
+    hass: HomeAssistant,
+    groups: dict[tuple[str, str], list[str]],
+    failures: list[Failure] | None = None,
+) -> None:
+    """Dispatch each group as one service call with an entity_id list.
+
+    With a ``failures`` list, a failing group is recorded there and the
+    remaining groups still run.
+    """
+    for (domain, service), entity_ids in groups.items():
+        if entity_ids:
+            await async_try_call(hass, domain, service, entity_ids, failures)
+
+
+# ---------------------------------------------------------------------------
+# Phase execution
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class Failure:
+    """A service call that raised, with the entities that did not switch."""
+
+    domain: str
+    service: str
+    entity_ids: list[str]
+    error: Exception
+
+
+async def async_try_call(
+    hass: HomeAssistant,
+    domain: str,
+    service: str,
+    entity_ids: list[str],
+    failures: list[Failure] | None,
+) -> None:
+    """Call a service; record a failure instead of raising if a list is given.
+
+    Home Assistant runs the service for every entity of a batch and then
+    raises the first error, so a failure is narrowed down to the entities
+    that did not reach the target state.
+    """
+    if failures is None:
+        await hass.services.async_call(
+            domain, service, {"entity_id": entity_ids}, blocking=True
+        )
+        return
+    try:
+        await hass.services.async_call(
+            domain, service, {"entity_id": entity_ids}, blocking=True
+        )
+    except Exception as err:  # noqa: BLE001 - one failing device must not abort the zone
+        # If every entity got there the error can't be pinned down; keep the batch
+        failed = [e for e in entity_ids if needs_change(hass, e, service)] or entity_ids
+        failures.append(Failure(domain, service, failed, err))
+
+
+@dataclass(slots=True)
+class Phase:
+    """A single batched service call that is part of a zone activation."""
+
+    name: str
+    domain: str
+    service: str
+    entity_ids: list[str]
+
+
+def diff_phases(
+    hass: HomeAssistant, stages: list[list[Phase]]
+) -> tuple[list[list[Phase]], int]:
+    """Drop entities already in their target state from every phase.
+
+    Returns new stages (the input is left untouched so cached plans stay
+    valid) and the number of skipped entity commands.
+    """
+    result: list[list[Phase]] = []
+    skipped = 0
+    for stage in stages:
+        filtered = []
+        for phase in stage:
+            pending = [
+                e for e in phase.entity_ids if needs_change(hass, e, phase.service)
+            ]
+            skipped += len(phase.entity_ids) - len(pending)
+            filtered.append(Phase(phase.name, phase.domain, phase.service, pending))
+        result.append(filtered)
+    return result, skipped
+
+
+async def async_run_phases(
+    hass: HomeAssistant,
+    stages: list[list[Phase]],
+    *,
+    max_parallel: int,
+    limiter: RateLimiter | None = None,
+    throughput: dict[str, list[float]] | None = None,
+    failures: list[Failure] | None = None,
+) -> dict[str, float]:
+    """Run phases concurrently, stage by stage, and time each one.
+
+    Stages act as barriers: every phase of a stage must finish before the
+    next stage starts. Within a stage at most ``max_parallel`` phases are in
+    flight at once. With a ``limiter``, calls are shaped per integration and
+    ``throughput`` collects [entities, seconds] per shaped integration.
+    With a ``failures`` list, failing calls are recorded there and the
+    remaining phases carry on instead of the first error aborting them.
+    Returns the wall-clock duration of each phase in seconds.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    timings: dict[str, float] = {}
+    if throughput is None:
+        throughput = {}
+
+    async def _run(phase: Phase) -> None:
+        async with semaphore:
+            start = time.monotonic()
+            if limiter is not None:
+                await limiter.async_call(
+                    phase.domain, phase.service, phase.entity_ids, throughput, failures
+                )
+            else:
+                await async_try_call(
+                    hass, phase.domain, phase.service, phase.entity_ids, failures
+                )
+            timings[phase.name] = time.monotonic() - start
+
+    for stage in stages:
+        await asyncio.gather(*(_run(phase) for phase in stage if phase.entity_ids))
+    return timings
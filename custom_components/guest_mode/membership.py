@@ -0,0 +1,194 @@
+"""Area, floor, label and device class zone membership for Guest Mode integration."""
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+
+from .const import CONF_AREAS, CONF_DEVICE_CLASSES, CONF_FLOORS, CONF_LABELS
+
+# Domains whose on/off states the zone services can switch and restore
+MEMBER_DOMAINS = frozenset(
+    ("automation", "cover", "fan", "humidifier", "input_boolean", "light", "siren", "switch")
+)
+
+# Registry event bursts (e.g. an integration adding its devices) are folded
+# into one notification
+NOTIFY_DELAY = 1
+
+
+def has_dynamic_members(zone_data: dict[str, Any]) -> bool:
+    """Return True if a zone selects entities by area, floor, label or class."""
+    return any(
+        zone_data.get(key) for key in (CONF_AREAS, CONF_FLOORS, CONF_LABELS, CONF_DEVICE_CLASSES)
+    )
+
+
+class MembershipIndex:
+    """Reverse indexes from areas, floors, labels and device classes to entities.
+
+    Built once from the area, device and entity registries and updated one
+    entity (or device, or area) at a time from registry events, so resolving
+    a zone is a handful of set unions instead of a registry scan.
+    ``on_change`` is called after a burst of membership changes.
+    """
+
+    def __init__(self, hass: HomeAssistant, on_change: Callable[[], None]) -> None:
+        self.hass = hass
+        self._on_change = on_change
+        self._area_entities: dict[str, set[str]] = {}
+        self._label_entities: dict[str, set[str]] = {}
+        self._class_entities: dict[str, set[str]] = {}
+        self._floor_areas: dict[str, set[str]] = {}
+        self._area_floor: dict[str, str] = {}
+        # entity_id -> (area_id, labels, device_class) it is indexed under
+        self._entity_keys: dict[str, tuple[str | None, frozenset[str], str | None]] = {}
+        self._unsub_notify: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_setup(self) -> CALLBACK_TYPE:
+        """Build the indexes and follow registry changes; returns an unsubscribe."""
+        for area in ar.async_get(self.hass).async_list_areas():
+            self._index_area(area.id, getattr(area, "floor_id", None))
+        for entry in er.async_get(self.hass).entities.values():
+            self._index_entity(entry.entity_id)
+
+        bus = self.hass.bus
+        unsubs = [
+            bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._handle_entity_event),
+            bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, self._handle_device_event),
+            bus.async_listen(ar.EVENT_AREA_REGISTRY_UPDATED, self._handle_area_event),
+        ]
+
+        @callback
+        def _async_unsub() -> None:
+            for unsub in unsubs:
+                unsub()
+            if self._unsub_notify is not None:
+                self._unsub_notify()
+                self._unsub_notify = None
+
+        return _async_unsub
+
+    def resolve(self, zone_data: dict[str, Any]) -> tuple[str, ...]:
+        """Return the sorted entity IDs a zone's dynamic selectors match.
+
+        Areas, floors and labels are combined; device classes narrow them
+        down, or on their own match every entity of those classes.
+        """
+        areas = set(zone_data.get(CONF_AREAS, []))
+        for floor_id in zone_data.get(CONF_FLOORS, []):
+            areas.update(self._floor_areas.get(floor_id, ()))
+        labels = zone_data.get(CONF_LABELS, [])
+        members: set[str] = set()
+        for area_id in areas:
+            members.update(self._area_entities.get(area_id, ()))
+        for label_id in labels:
+            members.update(self._label_entities.get(label_id, ()))
+
+        classes = zone_data.get(CONF_DEVICE_CLASSES, [])
+        if classes:
+            classed: set[str] = set()
+            for device_class in classes:
+                classed.update(self._class_entities.get(device_class, ()))
+            scoped = zone_data.get(CONF_AREAS) or zone_data.get(CONF_FLOORS) or labels
+            members = members & classed if scoped else classed
+        return tuple(sorted(members))
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _index_area(self, area_id: str, floor_id: str | None) -> None:
+        old = self._area_floor.pop(area_id, None)
+        if old is not None:
+            self._floor_areas[old].discard(area_id)
+        if floor_id is not None:
+            self._area_floor[area_id] = floor_id
+            self._floor_areas.setdefault(floor_id, set()).add(area_id)
+
+    def _unindex_entity(self, entity_id: str) -> None:
+        keys = self._entity_keys.pop(entity_id, None)
+        if keys is None:
+            return
+        area_id, labels, device_class = keys
+        if area_id is not None:
+            self._area_entities[area_id].discard(entity_id)
+        for label_id in labels:
+            self._label_entities[label_id].discard(entity_id)
+        if device_class is not None:
+            self._class_entities[device_class].discard(entity_id)
+
+    def _index_entity(self, entity_id: str) -> None:
+        self._unindex_entity(entity_id)
+        entry = er.async_get(self.hass).async_get(entity_id)
+        if entry is None or entry.disabled_by is not None or entry.domain not in MEMBER_DOMAINS:
+            return
+        device = (
+            dr.async_get(self.hass).async_get(entry.device_id) if entry.device_id else None
+        )
+        area_id = entry.area_id or (device.area_id if device else None)
+        # Labels are not available before Home Assistant 2024.4
+        labels = frozenset(getattr(entry, "labels", ())) | frozenset(
+            getattr(device, "labels", ()) if device else ()
+        )
+        device_class = entry.device_class or entry.original_device_class
+
+        self._entity_keys[entity_id] = (area_id, labels, device_class)
+        if area_id is not None:
+            self._area_entities.setdefault(area_id, set()).add(entity_id)
+        for label_id in labels:
+            self._label_entities.setdefault(label_id, set()).add(entity_id)
+        if device_class is not None:
+            self._class_entities.setdefault(device_class, set()).add(entity_id)
+
+    # ------------------------------------------------------------------
+    # Registry events
+    # ------------------------------------------------------------------
+
+    @callback
+    def _handle_entity_event(self, event: Event) -> None:
+        if old_entity_id := event.data.get("old_entity_id"):
+            self._unindex_entity(old_entity_id)
+        if event.data["action"] == "remove":
+            self._unindex_entity(event.data["entity_id"])
+        else:
+            self._index_entity(event.data["entity_id"])
+        self._async_schedule_notify()
+
+    @callback
+    def _handle_device_event(self, event: Event) -> None:
+        if event.data["action"] != "update":
+            return
+        changes = event.data.get("changes", {})
+        if "area_id" not in changes and "labels" not in changes:
+            return
+        registry = er.async_get(self.hass)
+        for entry in er.async_entries_for_device(registry, event.data["device_id"]):
+            self._index_entity(entry.entity_id)
+        self._async_schedule_notify()
+
+    @callback
+    def _handle_area_event(self, event: Event) -> None:
+        area_id = event.data["area_id"]
+        if event.data["action"] == "remove":
+            self._index_area(area_id, None)
+            self._area_entities.pop(area_id, None)
+        else:
+            area = ar.async_get(self.hass).async_get_area(area_id)
+            self._index_area(area_id, getattr(area, "floor_id", None))
+        self._async_schedule_notify()
+
+    @callback
+    def _async_schedule_notify(self) -> None:
+        if self._unsub_notify is None:
+            self._unsub_notify = async_call_later(self.hass, NOTIFY_DELAY, self._async_notify)
+
+    @callback
+    def _async_notify(self, _now: Any) -> None:
+        self._unsub_notify = None
+        self._on_change()
@@ -0,0 +1,94 @@
+"""Bounded rolling statistics for Guest Mode integration."""
+from __future__ import annotations
+
+from collections import deque
+import math
+import time
+
+DEFAULT_WINDOW = 50
+
+
+class RollingStats:
+    """Keeps the last ``window`` samples (seconds) in a ring buffer."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, value: float) -> None:
+        self._samples.append(value)
+
+    def percentile(self, pct: float) -> float | None:
+        """Return the nearest-rank percentile of the buffered samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def summary_ms(self) -> dict[str, float | None]:
+        """Return p50/p95/max in milliseconds."""
+        if not self._samples:
+            return {"p50": None, "p95": None, "max": None}
+        return {
+            "p50": round(self.percentile(50) * 1000, 1),
+            "p95": round(self.percentile(95) * 1000, 1),
+            "max": round(max(self._samples) * 1000, 1),
+        }
+
+
+class PhaseStats:
+    """Rolling histograms keyed by phase name, one ring buffer per phase."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self._window = window
+        self._phases: dict[str, RollingStats] = {}
+
+    def record(self, timings: dict[str, float]) -> None:
+        """Add one run's phase durations (seconds)."""
+        for phase, seconds in timings.items():
+            stats = self._phases.get(phase)
+            if stats is None:
+                stats = self._phases[phase] = RollingStats(self._window)
+            stats.add(seconds)
+
+    def get(self, phase: str) -> RollingStats | None:
+        return self._phases.get(phase)
+
+    def summary_ms(self) -> dict[str, dict[str, float | None]]:
+        """Return p50/p95/max in milliseconds for every phase."""
+        return {phase: stats.summary_ms() for phase, stats in self._phases.items()}
+
+
+class ToggleTimings:
+    """Per-phase histograms of a switch's turn on and turn off runs."""
+
+    def __init__(self) -> None:
+        self.turn_on = PhaseStats()
+        self.turn_off = PhaseStats()
+
+
+class Stopwatch:
+    """Splits one run into consecutive phases."""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+        self._start = self._mark = time.monotonic()
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the previous lap to ``phase``."""
+        now = time.monotonic()
+        self.timings[phase] = self.timings.get(phase, 0.0) + now - self._mark
+        self._mark = now
+
+    def merge(self, timings: dict[str, float]) -> None:
+        """Take over phases timed elsewhere, e.g. concurrent service groups."""
+        self.timings.update(timings)
+        self._mark = time.monotonic()
+
+    def stop(self) -> dict[str, float]:
+        """Record the overall duration and return all phase timings."""
+        self.timings["total"] = time.monotonic() - self._start
+        return self.timings
@@ -0,0 +1,108 @@
+"""Entity ownership tracking for overlapping Guest Mode zones."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from homeassistant.core import callback
+
+
+class OwnershipIndex:
+    """Reverse index of entity_id -> active zones that command it.
+
+    The first zone to claim an entity takes the snapshot, later zones only
+    register their target, and the snapshot travels to a remaining owner
+    when its holder is released, so the last releasing zone restores it.
+    Every operation is O(entities touched).
+    """
+
+    def __init__(self) -> None:
+        # entity_id -> {zone_id: service}, in claim order
+        self._owners: dict[str, dict[str, str]] = {}
+        # zone_id -> claimed entity IDs
+        self._claims: dict[str, dict[str, None]] = {}
+
+    @callback
+    def claim(self, zone_id: str, entity_id: str, service: str) -> tuple[bool, bool]:
+        """Register a zone's target for an entity.
+
+        Returns (first, redundant): ``first`` if no zone owned the entity yet
+        (the caller must snapshot it), ``redundant`` if the most recent other
+        owner already targets the same service (the command can be skipped).
+        """
+        owners = self._owners.setdefault(entity_id, {})
+        first = not owners
+        previous = owners.pop(zone_id, None)
+        redundant = bool(owners) and next(reversed(owners.values())) == service
+        owners[zone_id] = service
+        if previous is None:
+            self._claims.setdefault(zone_id, {})[entity_id] = None
+        return first, redundant
+
+    def preview_claim(self, zone_id: str, entity_id: str, service: str) -> tuple[bool, bool]:
+        """Return what ``claim`` would return, without registering anything."""
+        owners = self._owners.get(entity_id)
+        if not owners:
+            return True, False
+        others = [target for owner, target in owners.items() if owner != zone_id]
+        return False, bool(others) and others[-1] == service
+
+    def target(self, entity_id: str) -> str | None:
+        """Return the service of the entity's most recent owner, if any."""
+        owners = self._owners.get(entity_id)
+        return next(reversed(owners.values())) if owners else None
+
+    def claimed(self, zone_id: str) -> Iterable[str]:
+        """Return the entities a zone currently claims."""
+        return self._claims.get(zone_id, {}).keys()
+
+    @callback
+    def release(
+        self, zone_id: str, entity_ids: Iterable[str] | None = None
+    ) -> tuple[dict[str, str], list[tuple[str, str]]]:
+        """Drop every claim of a zone, or only those on ``entity_ids``.
+
+        Returns (handover, reapply): ``handover`` maps entities still owned by
+        another zone to the zone that should now hold their snapshot;
+        ``reapply`` lists (entity_id, service) pairs whose remaining owner
+        targets a different state than the released zone did.
+        """
+        handover: dict[str, str] = {}
+        reapply: list[tuple[str, str]] = []
+        if entity_ids is None:
+            released: Iterable[str] = self._claims.pop(zone_id, {})
+        else:
+            claims = self._claims.get(zone_id, {})
+            released = [e for e in entity_ids if e in claims]
+            for entity_id in released:
+                del claims[entity_id]
+        for entity_id in released:
+            owners = self._owners.get(entity_id)
+            if owners is None:
+                continue
+            service = owners.pop(zone_id, None)
+            if not owners:
+                del self._owners[entity_id]
+                continue
+            handover[entity_id] = next(iter(owners))
+            remaining = next(reversed(owners.values()))
+            if remaining != service:
+                reapply.append((entity_id, remaining))
+        return handover, reapply
+
+    def preview_release(
+        self, zone_id: str, entity_ids: Iterable[str] | None = None
+    ) -> tuple[dict[str, str], list[tuple[str, str]]]:
+        """Return what ``release`` would return, without dropping any claim."""
+        handover: dict[str, str] = {}
+        reapply: list[tuple[str, str]] = []
+        claims = self._claims.get(zone_id, {})
+        released = claims if entity_ids is None else [e for e in entity_ids if e in claims]
+        for entity_id in released:
+            owners = self._owners.get(entity_id, {})
+            others = [(owner, target) for owner, target in owners.items() if owner != zone_id]
+            if not others:
+                continue
+            handover[entity_id] = others[0][0]
+            if others[-1][1] != owners.get(zone_id):
+                reapply.append((entity_id, others[-1][1]))
+        return handover, reapply
@@ -0,0 +1,124 @@
+"""Precompiled zone activation plans for Guest Mode integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_AUTOMATIONS_OFF,
+    CONF_AUTOMATIONS_ON,
+    CONF_SCRIPTS_OFF,
+    CONF_SCRIPTS_ON,
+    CONF_ENTITIES_OFF,
+    CONF_ENTITIES_ON,
+    CONF_AUTOMATIONS_FIRST,
+    CONF_MEMBERS_MODE,
+)
+from .helpers import Phase
+
+# (phase name / zone key, service domain, service) in activation order
+_AUTOMATION_PHASES = (
+    (CONF_AUTOMATIONS_OFF, "automation", "turn_off"),
+    (CONF_AUTOMATIONS_ON,  "automation", "turn_on"),
+)
+_OTHER_PHASES = (
+    (CONF_SCRIPTS_OFF,  "script",        "turn_off"),
+    (CONF_SCRIPTS_ON,   "script",        "turn_on"),
+    (CONF_ENTITIES_OFF, "homeassistant", "turn_off"),
+    (CONF_ENTITIES_ON,  "homeassistant", "turn_on"),
+)
+
+
+@dataclass(slots=True)
+class ZonePlan:
+    """Everything a zone activation needs, resolved ahead of time."""
+
+    source: dict[str, Any]
+    stages: list[list[Phase]]
+    managed: list[str]
+    configured: frozenset[str]
+    missing: int
+    members: tuple[str, ...] = ()
+
+
+def zone_entity_lists(
+    zone_data: dict[str, Any], members: tuple[str, ...] = ()
+) -> dict[str, list[str]]:
+    """Return the entity list of each phase, dynamic members included.
+
+    ``members`` (matched by area, floor, label or device class) join the
+    automation or entity phase of the zone's members_mode; entities also
+    listed explicitly keep their explicit phase.
+    """
+    lists = {
+        key: zone_data.get(key, [])
+        for key, _domain, _service in _AUTOMATION_PHASES + _OTHER_PHASES
+    }
+    if not members:
+        return lists
+    explicit = {entity_id for entity_ids in lists.values() for entity_id in entity_ids}
+    turn_on = zone_data.get(CONF_MEMBERS_MODE, "off") == "on"
+    extra: dict[str, list[str]] = {}
+    for entity_id in members:
+        if entity_id in explicit:
+            continue
+        if entity_id.startswith("automation."):
+            key = CONF_AUTOMATIONS_ON if turn_on else CONF_AUTOMATIONS_OFF
+        else:
+            key = CONF_ENTITIES_ON if turn_on else CONF_ENTITIES_OFF
+        extra.setdefault(key, []).append(entity_id)
+    for key, entity_ids in extra.items():
+        lists[key] = [*lists[key], *entity_ids]
+    return lists
+
+
+def iter_zone_targets(
+    zone_data: dict[str, Any], members: tuple[str, ...] = ()
+) -> Iterator[tuple[str, str]]:
+    """Yield (entity_id, service) for every configured entity of a zone."""
+    lists = zone_entity_lists(zone_data, members)
+    for key, _domain, service in _AUTOMATION_PHASES + _OTHER_PHASES:
+        for entity_id in lists[key]:
+            yield entity_id, service
+
+
+def build_zone_plan(
+    hass: HomeAssistant, zone_data: dict[str, Any], members: tuple[str, ...] = ()
+) -> ZonePlan:
+    """Resolve a zone definition against the entities that currently exist."""
+    lists = zone_entity_lists(zone_data, members)
+    configured: set[str] = set()
+    managed: list[str] = []
+    missing = 0
+
+    def _phases(specs: tuple[tuple[str, str, str], ...]) -> list[Phase]:
+        nonlocal missing
+        phases = []
+        for key, domain, service in specs:
+            entity_ids = lists[key]
+            configured.update(entity_ids)
+            valid = [e for e in entity_ids if hass.states.get(e)]
+            missing += len(entity_ids) - len(valid)
+            managed.extend(valid)
+            phases.append(Phase(key, domain, service, valid))
+        return phases
+
+    automation_phases = _phases(_AUTOMATION_PHASES)
+    other_phases = _phases(_OTHER_PHASES)
+
+    # Optional barrier: automations settle before anything else is touched
+    if zone_data.get(CONF_AUTOMATIONS_FIRST, False):
+        stages = [automation_phases, other_phases]
+    else:
+        stages = [automation_phases + other_phases]
+
+    return ZonePlan(
+        source=zone_data,
+        stages=stages,
+        managed=managed,
+        configured=frozenset(configured),
+        missing=missing,
+        members=members,
+    )
@@ -0,0 +1,115 @@
+"""Per-integration rate shaping of Guest Mode service calls."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+
+from .helpers import Failure, async_try_call
+
+# Integrations that never need shaping: they don't talk to a radio network
+_UNSHAPED_PLATFORMS = frozenset(("automation", "script", "template"))
+
+
+class TokenBucket:
+    """Token bucket allowing ``burst`` entities at once and ``rate`` per second."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def async_acquire(self, tokens: int) -> None:
+        """Wait until ``tokens`` (at most ``burst``) tokens are available."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class RateLimiter:
+    """Shapes outgoing service calls per owning integration of the entities.
+
+    Limits come from the config entry as ``{platform: {"rate": .., "burst": ..}}``.
+    Entities of unlimited integrations are sent in one call at full speed.
+    """
+
+    def __init__(self, hass: HomeAssistant, limits: dict[str, dict[str, Any]]) -> None:
+        self.hass = hass
+        self._buckets: dict[str, TokenBucket] = {}
+        self.async_update(limits)
+
+    @callback
+    def async_update(self, limits: dict[str, dict[str, Any]]) -> None:
+        """Apply new limits, keeping buckets whose settings did not change."""
+        buckets: dict[str, TokenBucket] = {}
+        for platform, limit in limits.items():
+            rate = float(limit.get("rate", 0))
+            burst = int(limit.get("burst", 1))
+            if rate <= 0 or platform in _UNSHAPED_PLATFORMS:
+                continue
+            bucket = self._buckets.get(platform)
+            if bucket is None or bucket.rate != rate or bucket.burst != max(1, burst):
+                bucket = TokenBucket(rate, burst)
+            buckets[platform] = bucket
+        self._buckets = buckets
+
+    def _partition(self, entity_ids: list[str]) -> dict[str | None, list[str]]:
+        """Split entities by shaped platform; None collects everything else."""
+        if not self._buckets:
+            return {None: entity_ids}
+        registry = er.async_get(self.hass)
+        parts: dict[str | None, list[str]] = {}
+        for entity_id in entity_ids:
+            entry = registry.async_get(entity_id)
+            platform = entry.platform if entry and entry.platform in self._buckets else None
+            parts.setdefault(platform, []).append(entity_id)
+        return parts
+
+    async def async_call(
+        self,
+        domain: str,
+        service: str,
+        entity_ids: list[str],
+        throughput: dict[str, list[float]],
+        failures: list[Failure] | None = None,
+    ) -> None:
+        """Call a service for the entities, respecting per-integration limits.
+
+        Unlimited entities and each shaped platform run concurrently, so a
+        slow radio network never holds up fast integrations or another
+        network. ``throughput`` accumulates [entities, seconds] per shaped
+        platform; ``failures`` is passed on to async_try_call.
+        """
+
+        async def _shaped(platform: str, ids: list[str]) -> None:
+            bucket = self._buckets[platform]
+            start = time.monotonic()
+            for i in range(0, len(ids), bucket.burst):
+                chunk = ids[i:i + bucket.burst]
+                await bucket.async_acquire(len(chunk))
+                await async_try_call(self.hass, domain, service, chunk, failures)
+            stats = throughput.setdefault(platform, [0, 0.0])
+            stats[0] += len(ids)
+            stats[1] += time.monotonic() - start
+
+        await asyncio.gather(
+            *(
+                async_try_call(self.hass, domain, service, ids, failures)
+                if platform is None
+                else _shaped(platform, ids)
+                for platform, ids in self._partition(entity_ids).items()
+            )
+        )
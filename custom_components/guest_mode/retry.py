@@ -0,0 +1,126 @@
+"""Background retry queue for failed Guest Mode service calls."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .helpers import Failure
+from .ratelimit import RateLimiter
+from .timerheap import TimerHeap
+
+_LOGGER = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 300
+RETRY_MAX_ATTEMPTS = 5
+
+
+@dataclass(order=True, slots=True)
+class _Retry:
+    due: float
+    zone_id: str = field(compare=False)
+    entity_id: str = field(compare=False)
+    domain: str = field(compare=False)
+    service: str = field(compare=False)
+    attempt: int = field(compare=False)
+    generation: int = field(compare=False)
+
+
+class RetryQueue:
+    """Retries failed entity commands off the hot path with exponential backoff.
+
+    Entries live in a min-heap ordered by due time and a single timer is armed
+    for the earliest one. Each (zone, entity) pair has at most one pending
+    retry; a newer failure replaces the older entry. Retries that come due
+    together are sent as one call per service through the rate limiter.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, limiter: RateLimiter, on_change: Callable[[str], None]
+    ) -> None:
+        self.hass = hass
+        self._limiter = limiter
+        self._on_change = on_change
+        self._pending: dict[tuple[str, str], _Retry] = {}
+        # Bumped per zone on cancel so in-flight retries don't requeue
+        self._generation: dict[str, int] = {}
+        self._timers = TimerHeap(hass, time.monotonic, self._is_live, self._async_fire)
+
+    def pending(self, zone_id: str) -> int:
+        """Return the number of retries pending for a zone."""
+        return sum(1 for zone, _ in self._pending if zone == zone_id)
+
+    @callback
+    def async_add(
+        self, zone_id: str, domain: str, service: str, entity_ids: list[str], attempt: int = 1
+    ) -> None:
+        """Queue a retry of a failed call for each of its entities."""
+        due = time.monotonic() + min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+        generation = self._generation.get(zone_id, 0)
+        retries = [
+            _Retry(due, zone_id, entity_id, domain, service, attempt, generation)
+            for entity_id in entity_ids
+        ]
+        for retry in retries:
+            self._pending[(zone_id, retry.entity_id)] = retry
+        self._timers.async_push(*retries)
+        self._on_change(zone_id)
+
+    @callback
+    def async_cancel_zone(self, zone_id: str) -> None:
+        """Forget every pending retry of a zone (its target state changed)."""
+        self._generation[zone_id] = self._generation.get(zone_id, 0) + 1
+        keys = [key for key in self._pending if key[0] == zone_id]
+        if not keys:
+            return
+        for key in keys:
+            del self._pending[key]
+        self._on_change(zone_id)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the timer and drop everything."""
+        self._timers.async_shutdown()
+        self._pending.clear()
+
+    def _is_live(self, retry: _Retry) -> bool:
+        return self._pending.get((retry.zone_id, retry.entity_id)) is retry
+
+    @callback
+    def _async_fire(self) -> None:
+        due: dict[tuple[str, str], list[_Retry]] = {}
+        for retry in self._timers.pop_due():
+            del self._pending[(retry.zone_id, retry.entity_id)]
+            due.setdefault((retry.domain, retry.service), []).append(retry)
+        # One batched, rate-shaped call per service instead of one per entity
+        for (domain, service), retries in due.items():
+            self.hass.async_create_task(self._async_retry(domain, service, retries))
+        for zone_id in {retry.zone_id for retries in due.values() for retry in retries}:
+            self._on_change(zone_id)
+
+    async def _async_retry(self, domain: str, service: str, retries: list[_Retry]) -> None:
+        failures: list[Failure] = []
+        entity_ids = list(dict.fromkeys(retry.entity_id for retry in retries))
+        await self._limiter.async_call(domain, service, entity_ids, {}, failures)
+        errors = {
+            entity_id: failure.error
+            for failure in failures
+            for entity_id in failure.entity_ids
+        }
+        for retry in retries:
+            err = errors.get(retry.entity_id)
+            if err is None or retry.generation != self._generation.get(retry.zone_id, 0):
+                continue
+            if retry.attempt >= RETRY_MAX_ATTEMPTS:
+                _LOGGER.warning(
+                    "Giving up on %s.%s for %s after %d attempts: %s",
+                    domain, service, retry.entity_id, retry.attempt, err,
+                )
+                continue
+            self.async_add(
+                retry.zone_id, domain, service, [retry.entity_id], retry.attempt + 1
+            )
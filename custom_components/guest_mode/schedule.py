@@ -0,0 +1,142 @@
+"""Timed zone activation and expiry for Guest Mode integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .store import GuestModeStore
+from .timerheap import TimerHeap
+
+ACTION_TURN_ON = "turn_on"
+ACTION_TURN_OFF = "turn_off"
+
+SCHEDULE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required("zone_id"): cv.string,
+            vol.Optional("action", default=ACTION_TURN_OFF): vol.In(
+                [ACTION_TURN_ON, ACTION_TURN_OFF]
+            ),
+            vol.Exclusive("at", "when"): cv.datetime,
+            vol.Exclusive("delay", "when"): cv.time_period,
+        }
+    ),
+    cv.has_at_least_one_key("at", "delay"),
+)
+
+UNSCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required("zone_id"): cv.string,
+        vol.Optional("action"): vol.In([ACTION_TURN_ON, ACTION_TURN_OFF]),
+    }
+)
+
+
+@dataclass(order=True, slots=True)
+class _Scheduled:
+    due: float
+    zone_id: str = field(compare=False)
+    action: str = field(compare=False)
+
+
+class ZoneScheduler:
+    """Scheduled zone turn_on/turn_off actions behind a single timer.
+
+    Entries live in a min-heap ordered by due time (a UTC timestamp) and one
+    timer is armed for the earliest, so hundreds of schedules cost one wakeup
+    at a time. Each zone has at most one pending action of each kind; a newer
+    schedule replaces the older one. Schedules are persisted with the saved
+    states, and those that came due while Home Assistant was down run on start.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        store: GuestModeStore,
+        on_due: Callable[[str, str], None],
+        on_change: Callable[[str], None],
+    ) -> None:
+        self.hass = hass
+        self._store = store
+        self._on_due = on_due
+        self._on_change = on_change
+        # zone_id -> {action: due}; the persisted source of truth
+        self._schedules = store.schedules
+        self._timers = TimerHeap(
+            hass, lambda: dt_util.utcnow().timestamp(), self._is_live, self._async_fire
+        )
+
+    @callback
+    def async_start(self) -> None:
+        """Queue the persisted schedules and arm the timer."""
+        self._timers.async_push(
+            *(
+                _Scheduled(due, zone_id, action)
+                for zone_id, actions in self._schedules.items()
+                for action, due in actions.items()
+            )
+        )
+
+    def scheduled(self, zone_id: str) -> dict[str, str]:
+        """Return the pending actions of a zone with their due time."""
+        return {
+            action: dt_util.utc_from_timestamp(due).isoformat()
+            for action, due in self._schedules.get(zone_id, {}).items()
+        }
+
+    def is_scheduled(self, zone_id: str, action: str) -> bool:
+        return action in self._schedules.get(zone_id, {})
+
+    @callback
+    def async_schedule(self, zone_id: str, action: str, when: datetime) -> None:
+        """Run ``action`` on a zone at ``when``, replacing a pending one."""
+        due = dt_util.as_utc(when).timestamp()
+        self._schedules.setdefault(zone_id, {})[action] = due
+        self._timers.async_push(_Scheduled(due, zone_id, action))
+        self._store.async_schedule_save()
+        self._on_change(zone_id)
+
+    @callback
+    def async_cancel(self, zone_id: str, action: str | None = None) -> None:
+        """Forget the pending actions of a zone, or only one of them."""
+        actions = self._schedules.get(zone_id)
+        if not actions:
+            return
+        if action is None:
+            actions.clear()
+        elif actions.pop(action, None) is None:
+            return
+        if not actions:
+            del self._schedules[zone_id]
+        self._store.async_schedule_save()
+        self._on_change(zone_id)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the timer; the schedules stay persisted."""
+        self._timers.async_shutdown()
+
+    def _is_live(self, entry: _Scheduled) -> bool:
+        return self._schedules.get(entry.zone_id, {}).get(entry.action) == entry.due
+
+    @callback
+    def _async_fire(self) -> None:
+        due: list[_Scheduled] = []
+        for entry in self._timers.pop_due():
+            actions = self._schedules[entry.zone_id]
+            del actions[entry.action]
+            if not actions:
+                del self._schedules[entry.zone_id]
+            due.append(entry)
+        if due:
+            self._store.async_schedule_save()
+        for entry in due:
+            self._on_due(entry.zone_id, entry.action)
+        for zone_id in {entry.zone_id for entry in due}:
+            self._on_change(zone_id)
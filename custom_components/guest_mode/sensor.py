@@ -0,0 +1,147 @@
+"""Sensor platform for Guest Mode integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, SIGNAL_TIMINGS_UPDATED, SIGNAL_ZONE_REMOVED, SIGNAL_ZONES_ADDED
+from .metrics import ToggleTimings
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up timing sensors from config entry."""
+    zones = entry.data.get("zones", {})
+    entities: list[SensorEntity] = [GuestModeTimingSensor(hass, entry, None, "Guest Mode")]
+
+    for zone_id, zone_data in zones.items():
+        entities.append(GuestModeTimingSensor(hass, entry, zone_id, zone_data["name"]))
+
+    async_add_entities(entities)
+
+    @callback
+    def _async_zones_added(zone_ids: list[str]) -> None:
+        """Add timing sensors for zones created after setup."""
+        zones = entry.data.get("zones", {})
+        async_add_entities(
+            GuestModeTimingSensor(hass, entry, zone_id, zones[zone_id]["name"])
+            for zone_id in zone_ids
+        )
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ZONES_ADDED.format(entry.entry_id), _async_zones_added
+        )
+    )
+
+
+# ---------------------------------------------------------------------------
+# Timing sensor
+# ---------------------------------------------------------------------------
+
+class GuestModeTimingSensor(SensorEntity):
+    """Rolling p95 of how long a switch takes to turn on.
+
+    Per-phase p50/p95/max for turning on and off are exposed as attributes.
+    ``zone_id`` None stands for the main switch fan-out.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_should_poll = False
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        zone_id: str | None,
+        name: str,
+    ) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.zone_id = zone_id
+        self._default_name = name
+        key = "main" if zone_id is None else f"zone_{zone_id}"
+        self._attr_unique_id = f"{DOMAIN}_{key}_timing_{entry.entry_id}"
+
+    @property
+    def name(self) -> str:
+        if self.zone_id is None:
+            name = self._default_name
+        else:
+            zone = self.entry.data.get("zones", {}).get(self.zone_id, {})
+            name = zone.get("name", self._default_name)
+        return f"{name} activation time"
+
+    @property
+    def device_info(self) -> dr.DeviceInfo:
+        return dr.DeviceInfo(identifiers={(DOMAIN, self.entry.entry_id)})
+
+    @property
+    def native_value(self) -> float | None:
+        timings = self._timings()
+        stats = timings.turn_on.get("total") if timings else None
+        if stats is None:
+            return None
+        return stats.summary_ms()["p95"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        timings = self._timings()
+        if timings is None:
+            return {"turn_on": {}, "turn_off": {}}
+        return {
+            "turn_on": timings.turn_on.summary_ms(),
+            "turn_off": timings.turn_off.summary_ms(),
+        }
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_TIMINGS_UPDATED.format(self.entry.entry_id),
+                self._handle_timings_updated,
+            )
+        )
+        if self.zone_id is not None:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    SIGNAL_ZONE_REMOVED.format(self.entry.entry_id),
+                    self._handle_zone_removed,
+                )
+            )
+
+    @callback
+    def _handle_timings_updated(self, zone_id: str | None) -> None:
+        if zone_id == self.zone_id:
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_zone_removed(self, zone_id: str) -> None:
+        if zone_id == self.zone_id:
+            er.async_get(self.hass).async_remove(self.entity_id)
+
+    def _timings(self) -> ToggleTimings | None:
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        if self.zone_id is None:
+            return data["fan_out_timings"]
+        return data["timings"].get(self.zone_id)
@@ -0,0 +1,150 @@
+"""Capture and restore of zone snapshots for Guest Mode integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, State
+
+from .helpers import Failure, async_call_grouped, diff_groups, group_restore_calls
+from .trace import group_calls_trace
+
+# A snapshot maps entity_id -> saved value. The value is the plain state
+# string, or — in full mode, for domains with restorable attributes — a
+# scene-style dict {"state": ..., <attribute>: ...} holding only the
+# attributes that are set.
+SnapshotValue = str | dict[str, Any]
+
+SNAPSHOT_MODE_STATE = "state"
+SNAPSHOT_MODE_FULL = "full"
+
+# Attributes worth restoring per domain (everything scene.apply understands)
+_DOMAIN_ATTRIBUTES: dict[str, tuple[str, ...]] = {
+    "light": ("brightness", "color_mode", "effect"),
+    "climate": (
+        "temperature", "target_temp_high", "target_temp_low",
+        "preset_mode", "fan_mode", "swing_mode", "humidity",
+    ),
+    "cover": ("current_position", "current_tilt_position"),
+    "fan": ("percentage", "preset_mode", "oscillating", "direction"),
+    "humidifier": ("humidity", "mode"),
+    "media_player": ("volume_level", "is_volume_muted", "source", "sound_mode"),
+    "water_heater": ("temperature", "operation_mode", "away_mode"),
+}
+
+# Lights only need the color attribute matching their current color mode
+_LIGHT_COLOR_ATTRIBUTES = {
+    "color_temp": "color_temp_kelvin",
+    "hs": "hs_color",
+    "rgb": "rgb_color",
+    "rgbw": "rgbw_color",
+    "rgbww": "rgbww_color",
+    "xy": "xy_color",
+}
+
+
+def snapshot_state(state: State, mode: str) -> SnapshotValue:
+    """Return the compact snapshot value for a state."""
+    keys = _DOMAIN_ATTRIBUTES.get(state.domain)
+    if mode != SNAPSHOT_MODE_FULL or not keys:
+        return state.state
+
+    attributes = state.attributes
+    if state.domain == "light":
+        color_attribute = _LIGHT_COLOR_ATTRIBUTES.get(attributes.get("color_mode"))
+        if color_attribute:
+            keys = (*keys, color_attribute)
+
+    captured = {k: attributes[k] for k in keys if attributes.get(k) is not None}
+    if not captured:
+        return state.state
+    return {"state": state.state, **captured}
+
+
+def _needs_scene_restore(hass: HomeAssistant, entity_id: str, saved: dict[str, Any]) -> bool:
+    """Return True if the live state differs from a full snapshot value."""
+    state = hass.states.get(entity_id)
+    if state is None or state.state != saved["state"]:
+        return True
+    return any(
+        state.attributes.get(key) != value
+        for key, value in saved.items()
+        if key != "state"
+    )
+
+
+def plan_restore(
+    hass: HomeAssistant, saved: dict[str, SnapshotValue]
+) -> tuple[dict[tuple[str, str], list[str]], dict[str, dict[str, Any]], list[str]]:
+    """Split a zone snapshot into the calls that would restore it.
+
+    Returns the batched turn_on/turn_off groups, the scene.apply payload
+    for attribute snapshots and the entities already in their saved state.
+    """
+    plain: dict[str, str] = {}
+    scene: dict[str, dict[str, Any]] = {}
+    skipped: list[str] = []
+    for entity_id, value in saved.items():
+        if isinstance(value, str):
+            plain[entity_id] = value
+        elif _needs_scene_restore(hass, entity_id, value):
+            scene[entity_id] = value
+        else:
+            skipped.append(entity_id)
+
+    groups, plain_skipped = diff_groups(hass, group_restore_calls(plain))
+    if plain_skipped:
+        pending = {entity_id for entity_ids in groups.values() for entity_id in entity_ids}
+        skipped.extend(entity_id for entity_id in plain if entity_id not in pending)
+    return groups, scene, skipped
+
+
+def restore_calls_trace(
+    groups: dict[tuple[str, str], list[str]], scene: dict[str, dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Describe the calls of a restore planned by ``plan_restore``."""
+    traced = dict(groups)
+    if scene:
+        traced[("scene", "apply")] = list(scene)
+    return group_calls_trace(traced, "restore")
+
+
+async def async_restore_snapshot(
+    hass: HomeAssistant,
+    saved: dict[str, SnapshotValue],
+    calls: list[dict[str, Any]] | None = None,
+    failures: list[Failure] | None = None,
+) -> int:
+    """Restore a zone snapshot and return the number of skipped entities.
+
+    Plain states go through the batched turn_on/turn_off groups; attribute
+    snapshots are restored together with a single scene.apply call. With a
+    ``calls`` list, the dispatched calls are described there for traces.
+    With a ``failures`` list, failing calls are recorded there and every
+    other call still runs.
+    """
+    groups, scene, skipped = plan_restore(hass, saved)
+    if calls is not None:
+        calls.extend(restore_calls_trace(groups, scene))
+    await async_call_grouped(hass, groups, failures)
+    if scene:
+        try:
+            await hass.services.async_call(
+                "scene", "apply", {"entities": scene}, blocking=True
+            )
+        except Exception as err:  # noqa: BLE001 - recorded like a failed group
+            if failures is None:
+                raise
+            failed = [
+                entity_id for entity_id, value in scene.items()
+                if _needs_scene_restore(hass, entity_id, value)
+            ] or list(scene)
+            failures.append(Failure("scene", "apply", failed, err))
+    return len(skipped)
+
+
+def failed_snapshot(
+    saved: dict[str, SnapshotValue], failures: list[Failure]
+) -> dict[str, SnapshotValue]:
+    """Return the snapshot values of the entities a restore did not switch."""
+    failed = {entity_id for failure in failures for entity_id in failure.entity_ids}
+    return {entity_id: value for entity_id, value in saved.items() if entity_id in failed}
@@ -0,0 +1,65 @@
+"""Persistent storage of saved zone states and schedules for Guest Mode integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+# Coalesce bursts of zone toggles into a single disk write
+SAVE_DELAY = 5
+
+
+class GuestModeStore:
+    """Saved zone states and schedules backed by a debounced Home Assistant Store."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._dirty = False
+        self.saved_states: dict[str, dict[str, Any]] = {}
+        # zone_id -> {action: due UTC timestamp}
+        self.schedules: dict[str, dict[str, float]] = {}
+
+    async def async_load(self) -> None:
+        """Load saved states and schedules from disk."""
+        data = await self._store.async_load() or {}
+        self.saved_states = data.get("saved_states", {})
+        self.schedules = data.get("schedules", {})
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Schedule a write after the current burst of changes settles.
+
+        Only call this when a snapshot or schedule actually changed; untouched
+        zones never cause disk I/O.
+        """
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write pending changes immediately (used on unload)."""
+        if self._dirty:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the stored data (used when the config entry is removed)."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._dirty = False
+        # Store serializes in the executor while zones keep toggling on the
+        # event loop, so hand it a copy rather than the live dicts
+        return {
+            "saved_states": {
+                zone_id: dict(saved) for zone_id, saved in self.saved_states.items()
+            },
+            "schedules": {
+                zone_id: dict(actions) for zone_id, actions in self.schedules.items()
+            },
+        }
@@ -1,295 +1,985 @@
-"""Switch platform for Guest Mode integration."""
-from __future__ import annotations
-
-import logging
-from typing import Any
-
-from homeassistant.components.switch import SwitchEntity
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.restore_state import RestoreEntity
-
-from .const import (
-    DOMAIN,
-    CONF_AUTOMATIONS_OFF,
-    CONF_AUTOMATIONS_ON,
-    CONF_SCRIPTS_OFF,
-    CONF_SCRIPTS_ON,
-    CONF_ENTITIES_OFF,
-    CONF_ENTITIES_ON,
-)
-
-_LOGGER = logging.getLogger(__name__)
-
-
-async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
-) -> None:
-    """Set up switch entities from config entry."""
-    zones = entry.data.get("zones", {})
-    entities: list[SwitchEntity] = [MainGuestModeSwitch(hass, entry)]
-
-    for zone_id, zone_data in zones.items():
-        entities.append(ZoneGuestModeSwitch(hass, entry, zone_id, zone_data))
-
-    async_add_entities(entities)
-
-
-# ---------------------------------------------------------------------------
-# Shared device info
-# ---------------------------------------------------------------------------
-
-def _device_info(entry: ConfigEntry) -> dr.DeviceInfo:
-    return dr.DeviceInfo(
-        identifiers={(DOMAIN, entry.entry_id)},
-        name="Guest Mode",
-        manufacturer="KrX3D",
-        model="Guest Mode",
-        entry_type=dr.DeviceEntryType.SERVICE,
-    )
-
-
-# ---------------------------------------------------------------------------
-# Main (all-zones) switch
-# ---------------------------------------------------------------------------
-
-class MainGuestModeSwitch(SwitchEntity, RestoreEntity):
-    """Master switch — delegates to every zone switch."""
-
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-        self.hass = hass
-        self.entry = entry
-        self._is_on = False
-
-    @property
-    def unique_id(self) -> str:
-        return f"{DOMAIN}_main_{self.entry.entry_id}"
-
-    @property
-    def name(self) -> str:
-        return "Guest Mode"
-
-    @property
-    def is_on(self) -> bool:
-        return self._is_on
-
-    @property
-    def icon(self) -> str:
-        return "mdi:account-multiple"
-
-    @property
-    def device_info(self) -> dr.DeviceInfo:
-        return _device_info(self.entry)
-
-    async def async_turn_on(self, **kwargs: Any) -> None:
-        self._is_on = True
-        for zone_id in self.entry.data.get("zones", {}):
-            await self.hass.services.async_call(
-                "homeassistant", "turn_on",
-                {"entity_id": f"switch.guest_mode_{zone_id}"},
-            )
-        self.async_write_ha_state()
-
-    async def async_turn_off(self, **kwargs: Any) -> None:
-        self._is_on = False
-        for zone_id in self.entry.data.get("zones", {}):
-            await self.hass.services.async_call(
-                "homeassistant", "turn_off",
-                {"entity_id": f"switch.guest_mode_{zone_id}"},
-            )
-        self.async_write_ha_state()
-
-    async def async_added_to_hass(self) -> None:
-        await super().async_added_to_hass()
-        last = await self.async_get_last_state()
-        if last:
-            self._is_on = last.state == "on"
-
-
-# ---------------------------------------------------------------------------
-# Per-zone switch
-# ---------------------------------------------------------------------------
-
-class ZoneGuestModeSwitch(SwitchEntity, RestoreEntity):
-    """Switch for a single guest mode zone."""
-
-    _attr_has_entity_name = True
-
-    def __init__(
-        self,
-        hass: HomeAssistant,
-        entry: ConfigEntry,
-        zone_id: str,
-        zone_data: dict[str, Any],
-    ) -> None:
-        self.hass = hass
-        self.entry = entry
-        self.zone_id = zone_id
-        self.zone_data = zone_data
-        self._is_on = False
-
-    @property
-    def unique_id(self) -> str:
-        return f"{DOMAIN}_zone_{self.zone_id}_{self.entry.entry_id}"
-
-    @property
-    def name(self) -> str:
-        return self.zone_data["name"]
-
-    @property
-    def is_on(self) -> bool:
-        return self._is_on
-
-    @property
-    def icon(self) -> str:
-        return "mdi:door-open" if self._is_on else "mdi:door-closed"
-
-    @property
-    def device_info(self) -> dr.DeviceInfo:
-        return _device_info(self.entry)
-
-    # ------------------------------------------------------------------
-    # Turn ON
-    # ------------------------------------------------------------------
-
-    async def async_turn_on(self, **kwargs: Any) -> None:
-        """Enable guest mode for this zone."""
-        self._is_on = True
-        data = self.hass.data[DOMAIN][self.entry.entry_id]
-        data["saved_states"][self.zone_id] = {}
-
-        # Resolve only entities that currently exist in HA state machine
-        valid = self._resolve_entities()
-        removed = valid["removed_count"]
-        if removed:
-            _LOGGER.warning(
-                "Zone '%s': %d configured entities no longer exist and were skipped",
-                self.zone_data["name"], removed,
-            )
-
-        # Save current states for everything we are about to touch
-        all_managed = (
-            valid[CONF_AUTOMATIONS_OFF] + valid[CONF_AUTOMATIONS_ON]
-            + valid[CONF_SCRIPTS_OFF]     + valid[CONF_SCRIPTS_ON]
-            + valid[CONF_ENTITIES_OFF]    + valid[CONF_ENTITIES_ON]
-        )
-        for entity_id in all_managed:
-            state = self.hass.states.get(entity_id)
-            if state:
-                data["saved_states"][self.zone_id][entity_id] = state.state
-
-        # Apply changes — use domain-specific services where possible
-        await self._call_many("automation", "turn_off", valid[CONF_AUTOMATIONS_OFF])
-        await self._call_many("automation", "turn_on",  valid[CONF_AUTOMATIONS_ON])
-        await self._call_many("script",     "turn_off", valid[CONF_SCRIPTS_OFF])
-        await self._call_many("script",     "turn_on",  valid[CONF_SCRIPTS_ON])
-        await self._call_many("homeassistant", "turn_off", valid[CONF_ENTITIES_OFF])
-        await self._call_many("homeassistant", "turn_on",  valid[CONF_ENTITIES_ON])
-
-        # WiFi — only on first zone activation
-        if not self._other_zones_active():
-            await self._apply_wifi(guest_active=True)
-
-        self.async_write_ha_state()
-
-    # ------------------------------------------------------------------
-    # Turn OFF
-    # ------------------------------------------------------------------
-
-    async def async_turn_off(self, **kwargs: Any) -> None:
-        """Disable guest mode and restore previous states."""
-        self._is_on = False
-        data = self.hass.data[DOMAIN][self.entry.entry_id]
-
-        if self.zone_id in data["saved_states"]:
-            saved = data["saved_states"].pop(self.zone_id)
-            for entity_id, state in saved.items():
-                domain = entity_id.split(".", 1)[0]
-                svc_domain = domain if domain in ("automation", "script") else "homeassistant"
-                service = "turn_on" if state == "on" else "turn_off"
-                await self.hass.services.async_call(
-                    svc_domain, service, {"entity_id": entity_id}
-                )
-
-        # WiFi — only on last zone deactivation
-        if not self._other_zones_active():
-            await self._apply_wifi(guest_active=False)
-
-        self.async_write_ha_state()
-
-    # ------------------------------------------------------------------
-    # Restore
-    # ------------------------------------------------------------------
-
-    async def async_added_to_hass(self) -> None:
-        await super().async_added_to_hass()
-        last = await self.async_get_last_state()
-        if last:
-            self._is_on = last.state == "on"
-
-    # ------------------------------------------------------------------
-    # Helpers
-    # ------------------------------------------------------------------
-
-    def _resolve_entities(self) -> dict:
-        """Filter zone entity lists down to those that currently exist."""
-        zd = self.zone_data
-        result: dict[str, Any] = {}
-        total_configured = 0
-        total_valid = 0
-
-        for key in (
-            CONF_AUTOMATIONS_OFF, CONF_AUTOMATIONS_ON,
-            CONF_SCRIPTS_OFF,     CONF_SCRIPTS_ON,
-            CONF_ENTITIES_OFF,    CONF_ENTITIES_ON,
-        ):
-            configured = zd.get(key, [])
-            valid = [e for e in configured if self.hass.states.get(e)]
-            result[key] = valid
-            total_configured += len(configured)
-            total_valid += len(valid)
-
-        result["removed_count"] = total_configured - total_valid
-        return result
-
-    async def _call_many(self, domain: str, service: str, entity_ids: list[str]) -> None:
-        """Call a service for each entity in the list."""
-        for entity_id in entity_ids:
-            await self.hass.services.async_call(
-                domain, service, {"entity_id": entity_id}
-            )
-
-    async def _apply_wifi(self, *, guest_active: bool) -> None:
-        """Set the WiFi entity to the configured state (or its inverse on deactivation)."""
-        global_wifi = self.entry.data.get("global_wifi", {})
-        wifi_entity = global_wifi.get("entity")
-        if not wifi_entity:
-            return
-
-        if not self.hass.states.get(wifi_entity):
-            _LOGGER.warning("Configured WiFi entity '%s' no longer exists", wifi_entity)
-            return
-
-        wifi_mode = global_wifi.get("mode", "off")  # desired state when guest is ON
-        if guest_active:
-            service = "turn_on" if wifi_mode == "on" else "turn_off"
-        else:
-            service = "turn_off" if wifi_mode == "on" else "turn_on"
-
-        await self.hass.services.async_call(
-            "homeassistant", service, {"entity_id": wifi_entity}
-        )
-
-    def _other_zones_active(self) -> bool:
-        """Return True if any *other* zone switch is currently on."""
-        for zone_id in self.entry.data.get("zones", {}):
-            if zone_id == self.zone_id:
-                continue
-            state = self.hass.states.get(f"switch.guest_mode_{zone_id}")
-            if state and state.state == "on":
-                return True
-        return False
\ No newline at end of file
+"""Switch platform for Guest Mode integration."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import logging
+from typing import Any
+
+from homeassistant.components.switch import SwitchEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CoreState, Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_MAX_PARALLEL,
+    CONF_SNAPSHOT_MODE,
+    CONF_COALESCE_WINDOW,
+    CONF_ATOMIC,
+    CONF_ERROR_THRESHOLD,
+    CONF_CONFIRM,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_DURATION,
+    CONF_ENFORCE,
+    DEFAULT_MAX_PARALLEL,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_ERROR_THRESHOLD,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_DURATION,
+    SIGNAL_TIMINGS_UPDATED,
+    SIGNAL_ZONE_REMOVED,
+    SIGNAL_ZONES_ADDED,
+)
+from .confirm import CompletionTracker
+from .enforce import DriftEnforcer
+from .helpers import (
+    Failure,
+    Phase,
+    async_call_grouped,
+    async_run_phases,
+    diff_groups,
+    diff_phases,
+    group_calls,
+    needs_change,
+)
+from .membership import has_dynamic_members
+from .metrics import RollingStats, Stopwatch, ToggleTimings
+from .plan import ZonePlan, build_zone_plan, iter_zone_targets
+from .schedule import ACTION_TURN_OFF, ACTION_TURN_ON
+from .snapshot import (
+    SNAPSHOT_MODE_STATE,
+    async_restore_snapshot,
+    failed_snapshot,
+    plan_restore,
+    restore_calls_trace,
+    snapshot_state,
+)
+from .trace import TraceBuffer, failures_trace, group_calls_trace, new_trace, phase_calls
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up switch entities from config entry."""
+    zones = entry.data.get("zones", {})
+    entities: list[SwitchEntity] = [MainGuestModeSwitch(hass, entry)]
+
+    for zone_id, zone_data in zones.items():
+        entities.append(ZoneGuestModeSwitch(hass, entry, zone_id, zone_data))
+
+    async_add_entities(entities)
+
+    @callback
+    def _async_zones_added(zone_ids: list[str]) -> None:
+        """Add switches for zones created after setup."""
+        zones = entry.data.get("zones", {})
+        async_add_entities(
+            ZoneGuestModeSwitch(hass, entry, zone_id, zones[zone_id]) for zone_id in zone_ids
+        )
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ZONES_ADDED.format(entry.entry_id), _async_zones_added
+        )
+    )
+
+
+# ---------------------------------------------------------------------------
+# Shared device info
+# ---------------------------------------------------------------------------
+
+def _device_info(entry: ConfigEntry) -> dr.DeviceInfo:
+    return dr.DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name="Guest Mode",
+        manufacturer="KrX3D",
+        model="Guest Mode",
+        entry_type=dr.DeviceEntryType.SERVICE,
+    )
+
+
+@callback
+def _record_timings(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    zone_id: str | None,
+    direction: str,
+    watch: Stopwatch,
+) -> None:
+    """Add a finished run to the histograms and notify the timing sensors.
+
+    ``zone_id`` is None for the main switch fan-out.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    timings = data["fan_out_timings"] if zone_id is None else data["timings"].setdefault(
+        zone_id, ToggleTimings()
+    )
+    getattr(timings, direction).record(watch.stop())
+    async_dispatcher_send(hass, SIGNAL_TIMINGS_UPDATED.format(entry.entry_id), zone_id)
+
+
+# ---------------------------------------------------------------------------
+# Main (all-zones) switch
+# ---------------------------------------------------------------------------
+
+class MainGuestModeSwitch(SwitchEntity, RestoreEntity):
+    """Master switch — delegates to every zone switch."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self.hass = hass
+        self.entry = entry
+        self._is_on = False
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_main_{self.entry.entry_id}"
+
+    @property
+    def name(self) -> str:
+        return "Guest Mode"
+
+    @property
+    def is_on(self) -> bool:
+        return self._is_on
+
+    @property
+    def icon(self) -> str:
+        return "mdi:account-multiple"
+
+    @property
+    def device_info(self) -> dr.DeviceInfo:
+        return _device_info(self.entry)
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        self._is_on = True
+        watch = Stopwatch()
+        await self._async_fan_out(turn_on=True)
+        watch.lap("fan_out")
+        self.async_write_ha_state()
+        watch.lap("state_write")
+        _record_timings(self.hass, self.entry, None, "turn_on", watch)
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        self._is_on = False
+        watch = Stopwatch()
+        await self._async_fan_out(turn_on=False)
+        watch.lap("fan_out")
+        self.async_write_ha_state()
+        watch.lap("state_write")
+        _record_timings(self.hass, self.entry, None, "turn_off", watch)
+
+    async def _async_fan_out(self, *, turn_on: bool) -> None:
+        """Switch every zone entity directly and concurrently."""
+        zones = list(
+            self.hass.data[DOMAIN][self.entry.entry_id]["zone_entities"].values()
+        )
+        results = await asyncio.gather(
+            *(zone.async_turn_on() if turn_on else zone.async_turn_off() for zone in zones),
+            return_exceptions=True,
+        )
+        for zone, result in zip(zones, results):
+            if isinstance(result, Exception):
+                _LOGGER.error(
+                    "Zone '%s' failed to turn %s: %s",
+                    zone.zone_data["name"], "on" if turn_on else "off", result,
+                )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        last = await self.async_get_last_state()
+        if last:
+            self._is_on = last.state == "on"
+
+
+# ---------------------------------------------------------------------------
+# Per-zone switch
+# ---------------------------------------------------------------------------
+
+class ZoneGuestModeSwitch(SwitchEntity, RestoreEntity):
+    """Switch for a single guest mode zone."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        zone_id: str,
+        zone_data: dict[str, Any],
+    ) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.zone_id = zone_id
+        self.zone_data = zone_data
+        self._is_on = False
+        self._phase_timings: dict[str, float] = {}
+        self._plan: ZonePlan | None = None
+        self._skipped_calls = 0
+        self._throughput: dict[str, float] = {}
+        self._consistency = RollingStats()
+        self._unconfirmed = 0
+        self._enforcer: DriftEnforcer | None = None
+        self._drift_corrections = 0
+        # Toggle serialization: requested state, last fully applied state
+        # (None while unknown, e.g. after a cancelled sequence) and the
+        # worker / in-flight sequence applying the difference
+        self._target: bool | None = None
+        self._applied: bool | None = False
+        self._worker: asyncio.Task | None = None
+        self._sequence: asyncio.Task | None = None
+        self._sequence_target: bool | None = None
+        # Zone definition the zone was last activated with
+        self._applied_source: dict[str, Any] | None = None
+
+    @property
+    def unique_id(self) -> str:
+        return f"{DOMAIN}_zone_{self.zone_id}_{self.entry.entry_id}"
+
+    @property
+    def name(self) -> str:
+        return self.zone_data["name"]
+
+    @property
+    def is_on(self) -> bool:
+        return self._is_on
+
+    @property
+    def icon(self) -> str:
+        return "mdi:door-open" if self._is_on else "mdi:door-closed"
+
+    @property
+    def device_info(self) -> dr.DeviceInfo:
+        return _device_info(self.entry)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        return {
+            "phase_timings_ms": {
+                name: round(seconds * 1000, 1)
+                for name, seconds in self._phase_timings.items()
+            },
+            "skipped_calls": self._skipped_calls,
+            "integration_throughput": self._throughput,
+            "pending_retries": data["retry_queue"].pending(self.zone_id),
+            "time_to_consistency_ms": self._consistency.summary_ms(),
+            "unconfirmed_entities": self._unconfirmed,
+            "scheduled": data["scheduler"].scheduled(self.zone_id),
+            "drift_corrections": self._drift_corrections,
+        }
+
+    # ------------------------------------------------------------------
+    # Toggle serialization
+    # ------------------------------------------------------------------
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Enable guest mode for this zone."""
+        await self._async_request(True)
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Disable guest mode and restore previous states."""
+        await self._async_request(False)
+
+    async def _async_request(self, turn_on: bool) -> None:
+        """Record the requested state and wait until it has been applied.
+
+        Requests are serialized per zone: an opposing request cancels the
+        in-flight sequence, and all requests arriving within the coalescing
+        window are folded into one net change.
+        """
+        self._target = turn_on
+        sequence = self._sequence
+        if sequence is not None and not sequence.done() and self._sequence_target != turn_on:
+            sequence.cancel()
+        await asyncio.shield(self._async_ensure_worker())
+
+    @callback
+    def _async_ensure_worker(self) -> asyncio.Task:
+        """Return the running worker, starting one if needed."""
+        if self._worker is None or self._worker.done():
+            self._worker = self.hass.async_create_task(self._async_work())
+        return self._worker
+
+    def _needs_work(self) -> bool:
+        """Whether the requested state is not applied yet.
+
+        An active zone whose definition was edited also needs another pass.
+        """
+        if self._target is None:
+            return False
+        if self._target != self._applied:
+            return True
+        return self._target and self._applied_source != self._zone_definition()
+
+    async def _async_work(self) -> None:
+        """Apply the net requested state once the coalescing window closes."""
+        window = float(self._zone_definition().get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW))
+        if window:
+            await asyncio.sleep(window)
+
+        while self._needs_work():
+            target = self._target
+            self._applied = None
+            self._sequence_target = target
+            self._sequence = sequence = self.hass.async_create_task(
+                self._async_activate() if target else self._async_deactivate()
+            )
+            try:
+                # asyncio.wait does not raise if the sequence gets cancelled
+                await asyncio.wait((sequence,))
+            finally:
+                self._sequence = None
+            if sequence.cancelled():
+                continue
+            sequence.result()
+            # An atomic activation may have rolled back and left the zone off
+            self._applied = self._is_on
+
+    # ------------------------------------------------------------------
+    # Turn ON
+    # ------------------------------------------------------------------
+
+    async def _async_activate(self) -> None:
+        """Snapshot the zone's entities and apply guest mode."""
+        self._is_on = True
+        watch = Stopwatch()
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        saved = data["saved_states"].setdefault(self.zone_id, {})
+
+        # Decide first activation up front so concurrent toggles can't race;
+        # an already active zone is being re-synced after an edit
+        active_zones = data["active_zones"]
+        first_active = not active_zones
+        resync = self.zone_id in active_zones
+        active_zones.add(self.zone_id)
+        # Enforcement restarts with the new targets once the zone is applied
+        self._async_stop_enforcer()
+        if not resync:
+            self._drift_corrections = 0
+
+        # Precompiled plan: only entities that existed when it was built
+        plan = self._activation_plan()
+        if plan.missing:
+            _LOGGER.warning(
+                "Zone '%s': %d configured entities no longer exist and were skipped",
+                self.zone_data["name"], plan.missing,
+            )
+        watch.lap("resolve")
+
+        # Entities dropped from the zone since it was activated go back to
+        # their snapshot (or to the target of another owning zone)
+        release_calls: list[dict[str, Any]] = []
+        stale = [e for e in data["owners"].claimed(self.zone_id) if e not in plan.configured]
+        if stale:
+            await self._async_release(data, release_calls, stale)
+            watch.lap("release")
+
+        # Claim every entity; only the first owning zone snapshots it and
+        # commands already issued by another zone are skipped
+        snapshots = len(saved)
+        stages, redundant = self._claim_plan(plan, saved)
+        # A resync of unchanged entities takes no snapshot and writes nothing
+        if len(saved) != snapshots:
+            data["store"].async_schedule_save()
+        watch.lap("snapshot")
+
+        # Apply changes — only for entities not already in their target state
+        stages, skipped = diff_phases(self.hass, stages)
+        self._skipped_calls = redundant + skipped
+        watch.lap("diff")
+
+        # Describe the run for diagnostics; finished in the finally block
+        trace = new_trace(self.zone_id, self.zone_data["name"], "resync" if resync else "turn_on")
+        trace["calls"] = release_calls + phase_calls(stages)
+        trace["skipped"] = skipped
+        trace["redundant"] = redundant
+        trace["timings"] = watch.timings
+        if plan.missing:
+            trace["missing"] = sorted(plan.configured.difference(plan.managed))
+
+        # Subscribe before dispatching so no state change is missed
+        tracker = (
+            CompletionTracker(self.hass, stages)
+            if plan.source.get(CONF_CONFIRM, False) else None
+        )
+        try:
+            throughput: dict[str, list[float]] = {}
+            failures: list[Failure] = []
+            group_timings = await async_run_phases(
+                self.hass, stages,
+                max_parallel=int(plan.source.get(CONF_MAX_PARALLEL, DEFAULT_MAX_PARALLEL)),
+                limiter=data["rate_limiter"],
+                throughput=throughput,
+                failures=failures,
+            )
+            # One phase per service group
+            watch.merge(group_timings)
+            if failures:
+                trace["failures"] = failures_trace(failures)
+            # Atomic zones roll back instead of running half-applied; failures
+            # are narrowed to the entities that did not switch, so one
+            # unreachable light in a large group counts once
+            failed = len({e for failure in failures for e in failure.entity_ids})
+            if plan.source.get(CONF_ATOMIC, False) and failed > int(
+                plan.source.get(CONF_ERROR_THRESHOLD, DEFAULT_ERROR_THRESHOLD)
+            ):
+                _LOGGER.error(
+                    "Zone '%s': %d entities failed to switch, rolling back: %s",
+                    self.zone_data["name"], failed,
+                    "; ".join(str(failure.error) for failure in failures),
+                )
+                self._is_on = False
+                self._target = False
+                active_zones.discard(self.zone_id)
+                await self._async_release(data, trace["calls"])
+                watch.lap("rollback")
+                # Zones started alongside this one skipped WiFi because this
+                # zone claimed the first activation; apply it for them, or
+                # undo it if every other zone has left in the meantime
+                if first_active and active_zones:
+                    await self._apply_wifi(guest_active=True)
+                    watch.lap("wifi")
+                elif not first_active and not active_zones:
+                    await self._apply_wifi(guest_active=False)
+                    watch.lap("wifi")
+                trace["result"] = "rolled_back"
+                self._async_write_timed_state(watch, "turn_on")
+                return
+
+            # Failed calls are retried in the background; the zone stays on
+            for failure in failures:
+                _LOGGER.warning(
+                    "Zone '%s': %s.%s failed for %d entities, retrying in background: %s",
+                    self.zone_data["name"], failure.domain, failure.service,
+                    len(failure.entity_ids), failure.error,
+                )
+                data["retry_queue"].async_add(
+                    self.zone_id, failure.domain, failure.service, failure.entity_ids
+                )
+            # Achieved entities per second for each rate-shaped integration
+            self._throughput = {
+                platform: round(count / seconds, 2) if seconds else count
+                for platform, (count, seconds) in throughput.items()
+            }
+
+            # WiFi — only on first zone activation
+            if first_active:
+                await self._apply_wifi(guest_active=True)
+                watch.lap("wifi")
+
+            # Confirm mode: report on only once devices actually changed
+            if tracker is not None:
+                for failure in failures:
+                    tracker.async_discard(failure.entity_ids)
+                elapsed, self._unconfirmed = await tracker.async_wait(
+                    float(plan.source.get(CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT))
+                )
+                if elapsed is None:
+                    _LOGGER.warning(
+                        "Zone '%s': %d entities did not reach their target state in time",
+                        self.zone_data["name"], self._unconfirmed,
+                    )
+                else:
+                    self._consistency.add(elapsed)
+                trace["unconfirmed"] = self._unconfirmed
+                watch.lap("confirm")
+
+            trace["result"] = "on"
+            self._applied_source = plan.source
+            if not resync:
+                self._async_schedule_expiry(plan.source)
+            self._async_start_enforcer(plan.source, plan.members)
+            self._async_write_timed_state(watch, "turn_on")
+        except Exception as err:
+            trace["result"] = "error"
+            trace["error"] = str(err)
+            raise
+        finally:
+            if tracker is not None:
+                tracker.async_cancel()
+            self._traces().add(trace)
+
+    # ------------------------------------------------------------------
+    # Turn OFF
+    # ------------------------------------------------------------------
+
+    async def _async_deactivate(self) -> None:
+        """Restore the zone's snapshot and leave guest mode."""
+        self._is_on = False
+        watch = Stopwatch()
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+
+        active_zones = data["active_zones"]
+        last_active = self.zone_id in active_zones and len(active_zones) == 1
+        active_zones.discard(self.zone_id)
+        data["retry_queue"].async_cancel_zone(self.zone_id)
+        self._async_stop_enforcer()
+        # The expiry of this activation is done; a turn_off planned after a
+        # scheduled turn_on belongs to that next stay and is kept
+        scheduler = data["scheduler"]
+        if not scheduler.is_scheduled(self.zone_id, ACTION_TURN_ON):
+            scheduler.async_cancel(self.zone_id, ACTION_TURN_OFF)
+
+        trace = new_trace(self.zone_id, self.zone_data["name"], "turn_off")
+        trace["timings"] = watch.timings
+        try:
+            await self._async_release(data, trace["calls"])
+            trace["skipped"] = self._skipped_calls
+            watch.lap("restore")
+
+            # WiFi — only on last zone deactivation
+            if last_active:
+                await self._apply_wifi(guest_active=False)
+                watch.lap("wifi")
+
+            trace["result"] = "off"
+            self._async_write_timed_state(watch, "turn_off")
+        except Exception as err:
+            trace["result"] = "error"
+            trace["error"] = str(err)
+            raise
+        finally:
+            self._traces().add(trace)
+
+    async def _async_release(
+        self,
+        data: dict[str, Any],
+        calls: list[dict[str, Any]] | None = None,
+        entity_ids: list[str] | None = None,
+    ) -> None:
+        """Give up this zone's entities, restoring them in one grouped pass.
+
+        Used to turn the zone off, to roll back a failed atomic activation
+        and, with ``entity_ids``, to drop entities removed from an active
+        zone. With a ``calls`` list, the restore and re-apply calls are
+        described there for the trace. A failing call does not stop the
+        others; entities that could not be restored keep their snapshot so
+        the next turn_off or restore_zone_states tries again.
+        """
+        # Snapshots of entities still owned by other zones move to one of
+        # them; only the last releasing zone restores an entity
+        handover, reapply = data["owners"].release(self.zone_id, entity_ids)
+        self._skipped_calls = 0
+        failures: list[Failure] = []
+        if self.zone_id in data["saved_states"]:
+            if entity_ids is None:
+                saved = data["saved_states"].pop(self.zone_id)
+            else:
+                zone_saved = data["saved_states"][self.zone_id]
+                saved = {e: zone_saved.pop(e) for e in entity_ids if e in zone_saved}
+            for entity_id, holder in handover.items():
+                if entity_id in saved:
+                    data["saved_states"].setdefault(holder, {})[entity_id] = saved.pop(entity_id)
+            data["store"].async_schedule_save()
+            # Batched per (service domain, service) or one scene.apply,
+            # unchanged entities skipped
+            try:
+                self._skipped_calls = await async_restore_snapshot(
+                    self.hass, saved, calls, failures
+                )
+            except asyncio.CancelledError:
+                # Interrupted by a new activation: keep the original snapshot
+                # so that activation does not capture half-restored states
+                kept = data["saved_states"].setdefault(self.zone_id, {})
+                for entity_id, value in saved.items():
+                    kept.setdefault(entity_id, value)
+                raise
+            if failures:
+                kept = data["saved_states"].setdefault(self.zone_id, {})
+                for entity_id, value in failed_snapshot(saved, failures).items():
+                    kept.setdefault(entity_id, value)
+                data["store"].async_schedule_save()
+
+        # Shared entities go back to the target of their remaining owner
+        if reapply:
+            groups, skipped = diff_groups(self.hass, group_calls(reapply))
+            self._skipped_calls += skipped
+            if calls is not None:
+                calls.extend(group_calls_trace(groups, "reapply"))
+            await async_call_grouped(self.hass, groups, failures)
+
+        for failure in failures:
+            _LOGGER.warning(
+                "Zone '%s': restoring %s.%s failed for %d entities: %s",
+                self.zone_data["name"], failure.domain, failure.service,
+                len(failure.entity_ids), failure.error,
+            )
+
+    # ------------------------------------------------------------------
+    # Dry run
+    # ------------------------------------------------------------------
+
+    @callback
+    def async_plan_toggle(self, turn_on: bool) -> dict[str, Any]:
+        """Describe what turning the zone on or off would do right now.
+
+        Mirrors ``_async_activate`` / ``_async_deactivate`` against the live
+        states, claims and snapshots without calling a service or changing
+        any of them. ``action`` is "none" when the request would be a no-op.
+        """
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        active_zones = data["active_zones"]
+        result: dict[str, Any] = {
+            "zone_id": self.zone_id,
+            "zone": self.zone_data["name"],
+            "action": "none",
+            "calls": [],
+            "skipped": [],
+            "redundant": [],
+            "missing": [],
+            "snapshot": [],
+            "wifi": None,
+        }
+        if turn_on == self._applied and not (
+            turn_on and self._applied_source != self._zone_definition()
+        ):
+            return result
+
+        if turn_on:
+            resync = self.zone_id in active_zones
+            result["action"] = "resync" if resync else "turn_on"
+            plan = self._activation_plan()
+            result["missing"] = sorted(plan.configured.difference(plan.managed))
+            stale = [e for e in data["owners"].claimed(self.zone_id) if e not in plan.configured]
+            if stale:
+                self._preview_release(data, result, stale)
+            self._preview_claims(data, plan, result)
+            wifi_call = None if active_zones else self._wifi_call(guest_active=True)
+        else:
+            result["action"] = "turn_off"
+            self._preview_release(data, result)
+            last_active = self.zone_id in active_zones and len(active_zones) == 1
+            wifi_call = self._wifi_call(guest_active=False) if last_active else None
+
+        if wifi_call is not None:
+            wifi_entity, service = wifi_call
+            if self.hass.states.get(wifi_entity) is None:
+                result["missing"].append(wifi_entity)
+            else:
+                result["wifi"] = {"entity_id": wifi_entity, "service": f"homeassistant.{service}"}
+        return result
+
+    def _preview_claims(
+        self, data: dict[str, Any], plan: ZonePlan, result: dict[str, Any]
+    ) -> None:
+        """Dry-run counterpart of ``_claim_plan`` followed by ``diff_phases``."""
+        owners = data["owners"]
+        saved = data["saved_states"].get(self.zone_id, {})
+        stages: list[list[Phase]] = []
+        for stage in plan.stages:
+            phases = []
+            for phase in stage:
+                pending = []
+                for entity_id in phase.entity_ids:
+                    first, duplicate = owners.preview_claim(self.zone_id, entity_id, phase.service)
+                    if first and entity_id not in saved and self.hass.states.get(entity_id):
+                        result["snapshot"].append(entity_id)
+                    if duplicate:
+                        result["redundant"].append(entity_id)
+                    elif needs_change(self.hass, entity_id, phase.service):
+                        pending.append(entity_id)
+                    else:
+                        result["skipped"].append(entity_id)
+                phases.append(Phase(phase.name, phase.domain, phase.service, pending))
+            stages.append(phases)
+        result["calls"].extend(phase_calls(stages))
+
+    def _preview_release(
+        self,
+        data: dict[str, Any],
+        result: dict[str, Any],
+        entity_ids: list[str] | None = None,
+    ) -> None:
+        """Dry-run counterpart of ``_async_release``."""
+        handover, reapply = data["owners"].preview_release(self.zone_id, entity_ids)
+        zone_saved = data["saved_states"].get(self.zone_id, {})
+        released = zone_saved if entity_ids is None else entity_ids
+        saved = {
+            entity_id: zone_saved[entity_id]
+            for entity_id in released
+            if entity_id in zone_saved and entity_id not in handover
+        }
+        groups, scene, skipped = plan_restore(self.hass, saved)
+        result["calls"].extend(restore_calls_trace(groups, scene))
+        result["skipped"].extend(skipped)
+        if reapply:
+            for entity_id, service in reapply:
+                if not needs_change(self.hass, entity_id, service):
+                    result["skipped"].append(entity_id)
+            groups, _skipped = diff_groups(self.hass, group_calls(reapply))
+            result["calls"].extend(group_calls_trace(groups, "reapply"))
+
+    # ------------------------------------------------------------------
+    # Restore
+    # ------------------------------------------------------------------
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._zone_entities()[self.zone_id] = self
+        self.async_on_remove(
+            self.hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED, self._handle_registry_updated
+            )
+        )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_ZONE_REMOVED.format(self.entry.entry_id),
+                self._handle_zone_removed,
+            )
+        )
+        last = await self.async_get_last_state()
+        if last:
+            self._is_on = self._applied = self._target = last.state == "on"
+            if self._is_on:
+                self._applied_source = self._zone_definition()
+                data = self.hass.data[DOMAIN][self.entry.entry_id]
+                data["active_zones"].add(self.zone_id)
+                # Rebuild ownership from the configuration; snapshots were
+                # persisted with the zone that held them
+                definition = self._zone_definition()
+                members = self._members(definition)
+                for entity_id, service in iter_zone_targets(definition, members):
+                    data["owners"].claim(self.zone_id, entity_id, service)
+                self._async_start_enforcer(definition, members)
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        if self._worker is not None:
+            self._worker.cancel()
+        if self._sequence is not None:
+            self._sequence.cancel()
+        self._async_stop_enforcer()
+        zone_entities = self._zone_entities()
+        if zone_entities.get(self.zone_id) is self:
+            zone_entities.pop(self.zone_id)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @callback
+    def _async_write_timed_state(self, watch: Stopwatch, direction: str) -> None:
+        """Write state, then record the run's phase timings.
+
+        The state write is itself a phase, so it shows up in the attributes
+        of the next write and in the timing sensor right away.
+        """
+        self._phase_timings = dict(watch.timings)
+        self.async_write_ha_state()
+        watch.lap("state_write")
+        _record_timings(self.hass, self.entry, self.zone_id, direction, watch)
+
+    def _zone_definition(self) -> dict[str, Any]:
+        """Return the current zone definition from the config entry."""
+        return self.entry.data.get("zones", {}).get(self.zone_id, self.zone_data)
+
+    def _activation_plan(self) -> ZonePlan:
+        """Return the cached activation plan, building it on first use."""
+        plan = self._plan
+        if plan is None:
+            definition = self._zone_definition()
+            plan = build_zone_plan(self.hass, definition, self._members(definition))
+            # Entities are still being loaded during startup, so only cache
+            # once Home Assistant is running
+            if self.hass.state is CoreState.running:
+                self._plan = plan
+        return plan
+
+    @callback
+    def _async_schedule_expiry(self, definition: dict[str, Any]) -> None:
+        """Schedule the zone's automatic turn_off, unless one is already planned."""
+        duration = int(definition.get(CONF_DURATION, DEFAULT_DURATION))
+        scheduler = self.hass.data[DOMAIN][self.entry.entry_id]["scheduler"]
+        if duration and not scheduler.is_scheduled(self.zone_id, ACTION_TURN_OFF):
+            scheduler.async_schedule(
+                self.zone_id, ACTION_TURN_OFF, dt_util.utcnow() + timedelta(minutes=duration)
+            )
+
+    @callback
+    def _async_start_enforcer(self, definition: dict[str, Any], members: tuple[str, ...]) -> None:
+        """Keep the zone's entities in their target state while it is on, if enabled."""
+        if not definition.get(CONF_ENFORCE, False):
+            return
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        self._enforcer = DriftEnforcer(
+            self.hass,
+            self.zone_id,
+            definition["name"],
+            dict(iter_zone_targets(definition, members)),
+            data["owners"],
+            data["rate_limiter"],
+            self._async_drift_corrected,
+        )
+        self._enforcer.async_start()
+
+    @callback
+    def _async_stop_enforcer(self) -> None:
+        if self._enforcer is not None:
+            self._enforcer.async_stop()
+            self._enforcer = None
+
+    @callback
+    def _async_drift_corrected(
+        self, groups: dict[tuple[str, str], list[str]], failures: list[Failure]
+    ) -> None:
+        """Count and trace a drift correction pass."""
+        self._drift_corrections += sum(len(entity_ids) for entity_ids in groups.values())
+        trace = new_trace(self.zone_id, self.zone_data["name"], "enforce")
+        trace["calls"] = group_calls_trace(groups, "enforce")
+        if failures:
+            trace["failures"] = failures_trace(failures)
+        trace["result"] = "on"
+        self._traces().add(trace)
+        self.async_write_ha_state()
+
+    def _members(self, definition: dict[str, Any]) -> tuple[str, ...]:
+        """Return the entities matched by the zone's area/floor/label/class selectors."""
+        if not has_dynamic_members(definition):
+            return ()
+        return self.hass.data[DOMAIN][self.entry.entry_id]["members"].resolve(definition)
+
+    def _claim_plan(
+        self, plan: ZonePlan, saved: dict[str, Any]
+    ) -> tuple[list[list[Phase]], int]:
+        """Claim the plan's entities and snapshot the ones this zone owns first.
+
+        Returns the phases left to dispatch and the number of commands skipped
+        because another zone already issued them.
+        """
+        owners = self.hass.data[DOMAIN][self.entry.entry_id]["owners"]
+        mode = plan.source.get(CONF_SNAPSHOT_MODE, SNAPSHOT_MODE_STATE)
+        stages: list[list[Phase]] = []
+        redundant = 0
+        for stage in plan.stages:
+            phases = []
+            for phase in stage:
+                pending = []
+                for entity_id in phase.entity_ids:
+                    first, duplicate = owners.claim(self.zone_id, entity_id, phase.service)
+                    # An existing entry is from an interrupted restore; keep it
+                    if (
+                        first
+                        and entity_id not in saved
+                        and (state := self.hass.states.get(entity_id))
+                    ):
+                        saved[entity_id] = snapshot_state(state, mode)
+                    if duplicate:
+                        redundant += 1
+                    else:
+                        pending.append(entity_id)
+                phases.append(Phase(phase.name, phase.domain, phase.service, pending))
+            stages.append(phases)
+        return stages, redundant
+
+    @callback
+    def async_zone_config_updated(self) -> None:
+        """Apply an edited zone definition to the running entity.
+
+        The name and plan are replaced right away. An active zone is then
+        re-synced through the toggle worker: entities removed from the zone
+        are restored, new ones are snapshotted and switched, and unchanged
+        ones keep their snapshot.
+        """
+        definition = self._zone_definition()
+        renamed = definition.get("name") != self.zone_data.get("name")
+        self.zone_data = definition
+        if self._plan is None or self._plan.source != definition:
+            self._plan = None
+            self._activation_plan()
+        if renamed:
+            self.async_write_ha_state()
+            # Lets the zone's timing sensor pick up the new name
+            async_dispatcher_send(
+                self.hass, SIGNAL_TIMINGS_UPDATED.format(self.entry.entry_id), self.zone_id
+            )
+        if self._is_on and self._needs_work():
+            self._async_ensure_worker()
+
+    @callback
+    def async_members_updated(self) -> None:
+        """Follow area, floor, label or device class membership changes.
+
+        An active zone is re-synced: new members are snapshotted and
+        switched, entities that left are restored.
+        """
+        definition = self._zone_definition()
+        # Plans are not cached during startup, so there is nothing to follow
+        if not has_dynamic_members(definition) or self.hass.state is not CoreState.running:
+            return
+        if self._plan is not None and self._plan.members == self._members(definition):
+            return
+        self._plan = None
+        self._activation_plan()
+        if self._is_on:
+            # Marks the applied definition stale so the worker runs a pass
+            self._applied_source = None
+            self._async_ensure_worker()
+
+    @callback
+    def _handle_zone_removed(self, zone_id: str) -> None:
+        """Delete this switch once its zone has been removed and restored."""
+        if zone_id == self.zone_id:
+            er.async_get(self.hass).async_remove(self.entity_id)
+
+    @callback
+    def _handle_registry_updated(self, event: Event) -> None:
+        """Drop the plan when one of the configured entities changes."""
+        if self._plan is None:
+            return
+        configured = self._plan.configured
+        if (
+            event.data["entity_id"] in configured
+            or event.data.get("old_entity_id") in configured
+        ):
+            self._plan = None
+
+    def _wifi_call(self, *, guest_active: bool) -> tuple[str, str] | None:
+        """Return the WiFi entity and the service it gets, or None if unset."""
+        global_wifi = self.entry.data.get("global_wifi", {})
+        wifi_entity = global_wifi.get("entity")
+        if not wifi_entity:
+            return None
+
+        wifi_mode = global_wifi.get("mode", "off")  # desired state when guest is ON
+        if guest_active:
+            service = "turn_on" if wifi_mode == "on" else "turn_off"
+        else:
+            service = "turn_off" if wifi_mode == "on" else "turn_on"
+        return wifi_entity, service
+
+    async def _apply_wifi(self, *, guest_active: bool) -> None:
+        """Set the WiFi entity to the configured state (or its inverse on deactivation)."""
+        wifi_call = self._wifi_call(guest_active=guest_active)
+        if wifi_call is None:
+            return
+        wifi_entity, service = wifi_call
+
+        if not self.hass.states.get(wifi_entity):
+            _LOGGER.warning("Configured WiFi entity '%s' no longer exists", wifi_entity)
+            return
+
+        await self.hass.services.async_call(
+            "homeassistant", service, {"entity_id": wifi_entity}
+        )
+
+    def _traces(self) -> TraceBuffer:
+        """Return the diagnostics trace buffer of this config entry."""
+        return self.hass.data[DOMAIN][self.entry.entry_id]["traces"]
+
+    def _zone_entities(self) -> dict[str, ZoneGuestModeSwitch]:
+        """Return the live zone entities of this config entry, keyed by zone ID."""
+        return self.hass.data[DOMAIN][self.entry.entry_id]["zone_entities"]
\ No newline at end of file
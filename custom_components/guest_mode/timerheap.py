@@ -0,0 +1,88 @@
+"""Min-heap of timed entries behind a single timer for Guest Mode integration."""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Callable, Iterator
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+
+class TimerHeap:
+    """Entries ordered by due time with one timer armed for the earliest.
+
+    Entries are dataclasses ordered by their ``due`` field, measured on the
+    ``now`` clock (monotonic seconds or a UTC timestamp). Owners forget an
+    entry by making ``is_live`` return False for it; dead entries are
+    skipped lazily when they reach the top. When the timer fires, ``on_fire``
+    takes the due entries with ``pop_due`` and the timer is then armed for
+    the next live entry.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        now: Callable[[], float],
+        is_live: Callable[[Any], bool],
+        on_fire: Callable[[], None],
+    ) -> None:
+        self.hass = hass
+        self._now = now
+        self._is_live = is_live
+        self._on_fire = on_fire
+        self._heap: list[Any] = []
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._timer_due: float | None = None
+
+    @callback
+    def async_push(self, *entries: Any) -> None:
+        """Add entries and re-arm the timer if one of them is the earliest."""
+        for entry in entries:
+            heapq.heappush(self._heap, entry)
+        self._async_arm()
+
+    def pop_due(self) -> Iterator[Any]:
+        """Yield the live entries that are due, earliest first.
+
+        Liveness is checked as each entry is reached, so an owner that forgets
+        an entry while handling it never sees a duplicate of it.
+        """
+        now = self._now()
+        while self._heap and self._heap[0].due <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                yield entry
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the timer and drop every entry."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._timer_due = None
+        self._heap.clear()
+
+    @callback
+    def _async_arm(self) -> None:
+        """Arm the single timer for the earliest live entry."""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        due = self._heap[0].due
+        if self._unsub_timer is not None:
+            if self._timer_due is not None and self._timer_due <= due:
+                return
+            self._unsub_timer()
+        self._timer_due = due
+        self._unsub_timer = async_call_later(
+            self.hass, max(0, due - self._now()), self._async_fire
+        )
+
+    @callback
+    def _async_fire(self, _now: Any) -> None:
+        self._unsub_timer = None
+        self._timer_due = None
+        # A timer that fired early finds nothing due and just re-arms
+        self._on_fire()
+        self._async_arm()
@@ -0,0 +1,76 @@
+"""Activation and restore traces for Guest Mode diagnostics."""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .helpers import Failure, Phase
+
+DEFAULT_TRACE_LIMIT = 20
+
+
+class TraceBuffer:
+    """Keeps the last ``limit`` traces in a ring buffer."""
+
+    def __init__(self, limit: int = DEFAULT_TRACE_LIMIT) -> None:
+        self._traces: deque[dict[str, Any]] = deque(maxlen=limit)
+
+    def add(self, trace: dict[str, Any]) -> None:
+        self._traces.append(trace)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the buffered traces, oldest first."""
+        return list(self._traces)
+
+
+def new_trace(zone_id: str, name: str, action: str) -> dict[str, Any]:
+    """Start a trace; ``result`` stays "cancelled" unless the run finishes."""
+    return {
+        "zone_id": zone_id,
+        "zone": name,
+        "action": action,
+        "started": dt_util.utcnow().isoformat(),
+        "result": "cancelled",
+        "calls": [],
+    }
+
+
+def phase_calls(stages: list[list[Phase]]) -> list[dict[str, Any]]:
+    """Describe the grouped calls of an activation, stage by stage."""
+    return [
+        {
+            "stage": index,
+            "phase": phase.name,
+            "domain": phase.domain,
+            "service": phase.service,
+            "entity_ids": phase.entity_ids,
+        }
+        for index, stage in enumerate(stages)
+        for phase in stage
+        if phase.entity_ids
+    ]
+
+
+def group_calls_trace(
+    groups: dict[tuple[str, str], list[str]], phase: str
+) -> list[dict[str, Any]]:
+    """Describe grouped restore or re-apply calls."""
+    return [
+        {"phase": phase, "domain": domain, "service": service, "entity_ids": entity_ids}
+        for (domain, service), entity_ids in groups.items()
+        if entity_ids
+    ]
+
+
+def failures_trace(failures: list[Failure]) -> list[dict[str, Any]]:
+    return [
+        {
+            "domain": failure.domain,
+            "service": failure.service,
+            "entity_ids": failure.entity_ids,
+            "error": str(failure.error),
+        }
+        for failure in failures
+    ]
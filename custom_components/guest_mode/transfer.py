@@ -0,0 +1,152 @@
+"""Bulk zone export and import for Guest Mode integration."""
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    CONF_AUTOMATIONS_OFF,
+    CONF_AUTOMATIONS_ON,
+    CONF_SCRIPTS_OFF,
+    CONF_SCRIPTS_ON,
+    CONF_ENTITIES_OFF,
+    CONF_ENTITIES_ON,
+    CONF_AREAS,
+    CONF_FLOORS,
+    CONF_LABELS,
+    CONF_DEVICE_CLASSES,
+    CONF_MEMBERS_MODE,
+    CONF_MAX_PARALLEL,
+    CONF_AUTOMATIONS_FIRST,
+    CONF_SNAPSHOT_MODE,
+    CONF_COALESCE_WINDOW,
+    CONF_ATOMIC,
+    CONF_ERROR_THRESHOLD,
+    CONF_CONFIRM,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_DURATION,
+    CONF_ENFORCE,
+    DEFAULT_MAX_PARALLEL,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_ERROR_THRESHOLD,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_DURATION,
+)
+from .snapshot import SNAPSHOT_MODE_FULL, SNAPSHOT_MODE_STATE
+
+
+def _list_of(*validators: Any) -> vol.All:
+    return vol.All(cv.ensure_list, [vol.All(*validators)])
+
+
+# Same shape and limits as the zone form; missing options get the form defaults
+ZONE_SCHEMA = vol.Schema(
+    {
+        vol.Required("name"): vol.All(cv.string, vol.Strip, vol.Length(min=1)),
+        vol.Optional(CONF_AUTOMATIONS_OFF, default=[]): _list_of(cv.entity_domain("automation")),
+        vol.Optional(CONF_AUTOMATIONS_ON,  default=[]): _list_of(cv.entity_domain("automation")),
+        vol.Optional(CONF_SCRIPTS_OFF,     default=[]): _list_of(cv.entity_domain("script")),
+        vol.Optional(CONF_SCRIPTS_ON,      default=[]): _list_of(cv.entity_domain("script")),
+        vol.Optional(CONF_ENTITIES_OFF,    default=[]): _list_of(cv.entity_id),
+        vol.Optional(CONF_ENTITIES_ON,     default=[]): _list_of(cv.entity_id),
+        vol.Optional(CONF_AREAS,           default=[]): _list_of(cv.string),
+        vol.Optional(CONF_FLOORS,          default=[]): _list_of(cv.string),
+        vol.Optional(CONF_LABELS,          default=[]): _list_of(cv.string),
+        vol.Optional(CONF_DEVICE_CLASSES,  default=[]): _list_of(cv.string),
+        vol.Optional(CONF_MEMBERS_MODE,      default="off"): vol.In(["off", "on"]),
+        vol.Optional(CONF_MAX_PARALLEL,      default=DEFAULT_MAX_PARALLEL): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10)
+        ),
+        vol.Optional(CONF_AUTOMATIONS_FIRST, default=False): cv.boolean,
+        vol.Optional(CONF_SNAPSHOT_MODE,     default=SNAPSHOT_MODE_STATE): vol.In(
+            [SNAPSHOT_MODE_STATE, SNAPSHOT_MODE_FULL]
+        ),
+        vol.Optional(CONF_COALESCE_WINDOW,   default=DEFAULT_COALESCE_WINDOW): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=30)
+        ),
+        vol.Optional(CONF_ATOMIC,            default=False): cv.boolean,
+        vol.Optional(CONF_ERROR_THRESHOLD,   default=DEFAULT_ERROR_THRESHOLD): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=1000)
+        ),
+        vol.Optional(CONF_CONFIRM,           default=False): cv.boolean,
+        vol.Optional(CONF_CONFIRM_TIMEOUT,   default=DEFAULT_CONFIRM_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=300)
+        ),
+        vol.Optional(CONF_DURATION,          default=DEFAULT_DURATION): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=43200)
+        ),
+        vol.Optional(CONF_ENFORCE,           default=False): cv.boolean,
+    }
+)
+
+WIFI_SCHEMA = vol.Schema(
+    {
+        vol.Optional("entity"): vol.Any(None, cv.entity_id),
+        vol.Optional("mode", default="off"): vol.In(["on", "off"]),
+    }
+)
+
+IMPORT_SCHEMA = vol.Schema(
+    {
+        vol.Required("zones"): vol.Schema({cv.slug: dict}),
+        vol.Optional("global_wifi"): dict,
+        vol.Optional("replace", default=False): cv.boolean,
+    }
+)
+
+
+@callback
+def export_zones(entry: ConfigEntry) -> dict[str, Any]:
+    """Return the zones and WiFi settings in the format import_zones accepts."""
+    return {
+        "zones": dict(entry.data.get("zones", {})),
+        "global_wifi": dict(entry.data.get("global_wifi", {})),
+    }
+
+
+@callback
+def async_import_zones(
+    hass: HomeAssistant, entry: ConfigEntry, data: dict[str, Any]
+) -> dict[str, Any]:
+    """Validate every zone, then write the config entry once.
+
+    All validation errors are reported together and nothing is written
+    if there are any. Zones are added, updated or (with ``replace``)
+    removed in place by the update listener, without a reload.
+    """
+    zones: dict[str, Any] = {}
+    errors: list[str] = []
+    for zone_id, zone_data in data["zones"].items():
+        try:
+            zones[zone_id] = ZONE_SCHEMA(zone_data)
+        except vol.MultipleInvalid as err:
+            errors.extend(f"{zone_id}: {error}" for error in err.errors)
+    global_wifi = entry.data.get("global_wifi", {})
+    if "global_wifi" in data:
+        try:
+            global_wifi = WIFI_SCHEMA(data["global_wifi"])
+        except vol.MultipleInvalid as err:
+            errors.extend(f"global_wifi: {error}" for error in err.errors)
+    if errors:
+        raise ServiceValidationError(f"Invalid Guest Mode import: {'; '.join(errors)}")
+
+    current = entry.data.get("zones", {})
+    merged = {} if data["replace"] else dict(current)
+    merged.update(zones)
+    result = {
+        "added": [zone_id for zone_id in zones if zone_id not in current],
+        "updated": [
+            zone_id for zone_id in zones
+            if zone_id in current and current[zone_id] != zones[zone_id]
+        ],
+        "removed": [zone_id for zone_id in current if zone_id not in merged],
+    }
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, "zones": merged, "global_wifi": global_wifi}
+    )
+    return result